@@ -0,0 +1,81 @@
+"""Encode throughput and /api/embed latency benchmarks for embedding_api.py.
+
+``--model stub`` swaps in the deterministic StubEncoder; any other value is
+loaded as EMBEDDING_MODEL from the local model cache. /api/embed requests
+store their points through VECTOR_STORE_URL with ``wait=true`` when
+``--store`` is given. Usually started by run.py.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from report import latency_metrics, metric
+from synthetic import StubEncoder, corpus
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "embedding-api-service"))
+
+
+def run(args):
+    import embedding_api
+    from batch_sizer import AdaptiveBatchSizer
+
+    if args.model == "stub":
+        embedding_api._model = StubEncoder(seed=args.seed)
+    model = embedding_api.get_model()
+
+    records = corpus("job", max(args.embed_requests, args.encode_texts // 3 + 1), seed=args.seed)
+    texts = [text for record in records for text in record["sections"].values()][:args.encode_texts]
+
+    results = {}
+    embedding_api.dynamic_batch_encode(model, texts[:32], AdaptiveBatchSizer(8, min_size=8, max_size=8))
+    for batch_size in args.batch_sizes:
+        best = None
+        for _ in range(args.repeat):
+            # A fixed-size sizer, so every batch has exactly batch_size texts
+            sizer = AdaptiveBatchSizer(batch_size, min_size=batch_size, max_size=batch_size)
+            started = time.perf_counter()
+            embedding_api.dynamic_batch_encode(model, texts, sizer)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        results[f"encode.batch_{batch_size}.texts_per_sec"] = metric(len(texts) / best, "texts/s", "higher")
+
+    client = embedding_api.app.test_client()
+    seconds = []
+    for record in records[:args.embed_requests]:
+        started = time.perf_counter()
+        response = client.post("/api/embed", json={"entity_type": "job", **record, "wait": args.store})
+        seconds.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            raise RuntimeError(f"/api/embed returned {response.status_code}: {response.get_data(as_text=True)}")
+    results.update(latency_metrics("embed.end_to_end", seconds))
+
+    seconds = []
+    for record in records[:args.embed_requests]:
+        started = time.perf_counter()
+        client.post("/api/query-embed", json={"query_text": record["sections"]["description"] + " (query)"})
+        seconds.append(time.perf_counter() - started)
+    results.update(latency_metrics("query_embed", seconds))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="stub", help="'stub' or a locally cached sentence-transformers model")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 16, 64, 128])
+    parser.add_argument("--encode-texts", type=int, default=1024, help="Texts encoded per batch size")
+    parser.add_argument("--embed-requests", type=int, default=200, help="/api/embed requests to time")
+    parser.add_argument("--repeat", type=int, default=3, help="Encode runs per batch size, the fastest counts")
+    parser.add_argument("--store", action="store_true", help="Wait for points to be stored in the vector store")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", required=True, help="JSON file for the results")
+    args = parser.parse_args()
+
+    results = run(args)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Upsert and search benchmarks for vector_logic.py.
+
+Runs against QDRANT_LOCATION (an embedded in-memory Qdrant when run through
+run.py) or a real server via QDRANT_URL. Usually started by run.py.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from report import latency_metrics, metric
+from synthetic import SELECTIVITY_FIELDS, StubEncoder, corpus
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "vector_store"))
+
+
+async def run(args):
+    import vector_logic
+
+    await vector_logic.create_resume_collection()
+
+    texts, payloads = [], []
+    for record in corpus("resume", args.corpus_size, seed=args.seed):
+        for section, text in record["sections"].items():
+            texts.append(text)
+            payloads.append({"section": section, **record["metadata"]})
+    vectors = StubEncoder(seed=args.seed).encode(texts, batch_size=256)
+
+    results = {}
+    batch_seconds = []
+    started = time.perf_counter()
+    for start in range(0, len(vectors), args.upsert_batch):
+        batch_started = time.perf_counter()
+        await vector_logic.add_resume("benchmark", None, vectors[start:start + args.upsert_batch],
+                                      payloads[start:start + args.upsert_batch])
+        batch_seconds.append(time.perf_counter() - batch_started)
+    elapsed = time.perf_counter() - started
+    results["upsert.points_per_sec"] = metric(len(vectors) / elapsed, "points/s", "higher")
+    results.update(latency_metrics(f"upsert.batch_{args.upsert_batch}", batch_seconds))
+
+    # Queries are stored vectors with a little noise, like a re-encoded resume
+    rng = np.random.default_rng(args.seed + 1)
+    queries = vectors[rng.integers(0, len(vectors), size=args.queries)]
+    queries = queries + rng.standard_normal(queries.shape).astype(np.float32) * 0.05
+
+    for query in queries[:min(10, len(queries))]:
+        await vector_logic.search_resumes(query, None, max(args.top_k))
+
+    for top_k in args.top_k:
+        for field in (None, *SELECTIVITY_FIELDS):
+            label = f"filter_1_in_{SELECTIVITY_FIELDS[field]}" if field else "filter_none"
+            filters = {field: 0} if field else None
+            seconds = []
+            for query in queries:
+                query_started = time.perf_counter()
+                await vector_logic.search_resumes(query, None, top_k, metadata_filters=filters)
+                seconds.append(time.perf_counter() - query_started)
+            results.update(latency_metrics(f"search.top_k_{top_k}.{label}", seconds))
+
+    # The same queries through one Qdrant batch call per args.search_batch
+    seconds = []
+    for start in range(0, len(queries), args.search_batch):
+        chunk = queries[start:start + args.search_batch]
+        batch_started = time.perf_counter()
+        await vector_logic.search_resumes_batch([{"query_embedding": query, "top_k": 10} for query in chunk])
+        seconds.extend([(time.perf_counter() - batch_started) / len(chunk)] * len(chunk))
+    results.update(latency_metrics(f"search_batch.top_k_10.batch_{args.search_batch}.per_query", seconds))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus-size", type=int, default=2000, help="Synthetic resumes to upsert")
+    parser.add_argument("--upsert-batch", type=int, default=256, help="Points per upsert")
+    parser.add_argument("--queries", type=int, default=200, help="Searches per top_k and filter")
+    parser.add_argument("--top-k", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--search-batch", type=int, default=16, help="Queries per batch search")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", required=True, help="JSON file for the results")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
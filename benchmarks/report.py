@@ -0,0 +1,79 @@
+"""Benchmark result records and regression checks.
+
+Every measurement is a flat ``name -> {"value", "unit", "better"}`` entry,
+where ``better`` says whether "lower" or "higher" values are improvements.
+Compare two result files with:
+
+    python benchmarks/report.py baseline.json current.json --tolerance 0.15
+"""
+import argparse
+import json
+
+import numpy as np
+
+
+def metric(value, unit, better):
+    return {"value": round(float(value), 4), "unit": unit, "better": better}
+
+
+def latency_metrics(prefix, seconds):
+    """p50/p90/p99/mean latency in milliseconds and sequential throughput of ``seconds`` samples."""
+    samples = np.asarray(seconds, dtype=np.float64) * 1000.0
+    if not len(samples):
+        return {}
+    return {
+        f"{prefix}.p50_ms": metric(np.percentile(samples, 50), "ms", "lower"),
+        f"{prefix}.p90_ms": metric(np.percentile(samples, 90), "ms", "lower"),
+        f"{prefix}.p99_ms": metric(np.percentile(samples, 99), "ms", "lower"),
+        f"{prefix}.mean_ms": metric(samples.mean(), "ms", "lower"),
+        f"{prefix}.per_sec": metric(1000.0 / samples.mean() if samples.mean() else 0.0, "req/s", "higher"),
+    }
+
+
+def compare(baseline, current, tolerance=0.15):
+    """Metrics of ``current`` that are worse than ``baseline`` by more than ``tolerance`` (a fraction).
+
+    Returns ``(name, baseline value, current value, relative change)`` tuples;
+    the change is positive when the metric got worse.
+    """
+    regressions = []
+    for name, entry in sorted(current.get("metrics", {}).items()):
+        base = baseline.get("metrics", {}).get(name)
+        if base is None or not base["value"]:
+            continue
+        change = (entry["value"] - base["value"]) / abs(base["value"])
+        if entry["better"] == "higher":
+            change = -change
+        if change > tolerance:
+            regressions.append((name, base["value"], entry["value"], change))
+    return regressions
+
+
+def print_regressions(regressions, tolerance):
+    if not regressions:
+        print(f"No regressions beyond {tolerance:.0%}")
+        return
+    print(f"{len(regressions)} regressions beyond {tolerance:.0%}:")
+    for name, base, value, change in regressions:
+        print(f"  {name}: {base} -> {value} ({change:+.1%} worse)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flag regressions between two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Relative change that counts as a regression (default 0.15)")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = compare(baseline, current, args.tolerance)
+    print_regressions(regressions, args.tolerance)
+    raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""Run the offline benchmark suite and write the results as JSON.
+
+Starts the vector store on a free port with an embedded in-memory Qdrant
+(or against ``--qdrant-url``), then runs bench_vector_store.py and
+bench_embedding.py in their own processes, since both services have
+top-level modules with the same names. Example:
+
+    python benchmarks/run.py --corpus-size 5000 --baseline benchmarks/results/baseline.json
+
+Exits 1 when ``--baseline`` is given and a metric regressed by more than
+``--tolerance``.
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from report import compare, print_regressions
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARKS_DIR)
+VECTOR_STORE_DIR = os.path.join(ROOT, "vector_store")
+EMBEDDING_DIR = os.path.join(ROOT, "embedding-api-service")
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _post(url):
+    request = urllib.request.Request(url, data=b"", method="POST")
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.read()
+
+
+def _start_vector_store(env, timeout=60.0):
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "wsgi:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=VECTOR_STORE_DIR, env=env
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while True:
+        if process.poll() is not None:
+            raise RuntimeError(f"Vector store exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"{url}/readyz", timeout=1):
+                break
+        except OSError:
+            if time.monotonic() > deadline:
+                process.terminate()
+                raise RuntimeError(f"Vector store not ready after {timeout:.0f}s")
+            time.sleep(0.2)
+    _post(f"{url}/collection/create")
+    _post(f"{url}/job/collection/create")
+    return process, url
+
+
+def _run_stage(script, cwd, env, stage_args):
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        output = f.name
+    try:
+        subprocess.run([sys.executable, os.path.join(BENCHMARKS_DIR, script), *stage_args, "--output", output],
+                       cwd=cwd, env=env, check=True)
+        with open(output) as f:
+            return json.load(f)
+    finally:
+        os.unlink(output)
+
+
+def _git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _meta(args):
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git_sha": _git("rev-parse", "--short", "HEAD") or "unknown",
+        "git_dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": {name: value for name, value in vars(args).items() if name not in ("output", "baseline")},
+    }
+
+
+def _print_results(results):
+    width = max((len(name) for name in results["metrics"]), default=0)
+    for name, entry in sorted(results["metrics"].items()):
+        print(f"{name:<{width}}  {entry['value']:>12.3f} {entry['unit']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the embed, ingest and search paths.")
+    parser.add_argument("--corpus-size", type=int, default=2000, help="Synthetic resumes upserted before searching")
+    parser.add_argument("--queries", type=int, default=200, help="Searches per top_k and filter")
+    parser.add_argument("--top-k", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--upsert-batch", type=int, default=256, help="Points per upsert")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 16, 64, 128],
+                        help="Encode batch sizes to measure")
+    parser.add_argument("--encode-texts", type=int, default=1024, help="Texts encoded per batch size")
+    parser.add_argument("--embed-requests", type=int, default=200, help="/api/embed requests to time")
+    parser.add_argument("--model", default="stub",
+                        help="'stub' (default) or a locally cached 768-dimensional sentence-transformers model")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--qdrant-url", help="Benchmark a Qdrant server instead of the in-memory one")
+    parser.add_argument("--search-cache", action="store_true", help="Keep the vector store's search cache on")
+    parser.add_argument("--output", help="Result file (default benchmarks/results/<timestamp>-<sha>.json)")
+    parser.add_argument("--baseline", help="Earlier result file to flag regressions against")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Relative change that counts as a regression (default 0.15)")
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=BENCHMARKS_DIR, HF_HUB_OFFLINE="1", TRANSFORMERS_OFFLINE="1")
+    if args.qdrant_url:
+        env.pop("QDRANT_LOCATION", None)
+        env["QDRANT_URL"] = args.qdrant_url
+    else:
+        env["QDRANT_LOCATION"] = ":memory:"
+    if not args.search_cache:
+        # Repeated queries would otherwise measure the cache, not Qdrant
+        env["SEARCH_CACHE_SIZE"] = "0"
+
+    results = {"meta": _meta(args), "metrics": {}}
+    results["metrics"].update(_run_stage("bench_vector_store.py", VECTOR_STORE_DIR, env, [
+        "--corpus-size", str(args.corpus_size),
+        "--queries", str(args.queries),
+        "--top-k", *map(str, args.top_k),
+        "--upsert-batch", str(args.upsert_batch),
+        "--seed", str(args.seed),
+    ]))
+
+    process, url = _start_vector_store(env)
+    try:
+        embedding_env = dict(env, VECTOR_STORE_URL=url)
+        if args.model != "stub":
+            embedding_env["EMBEDDING_MODEL"] = args.model
+        results["metrics"].update(_run_stage("bench_embedding.py", EMBEDDING_DIR, embedding_env, [
+            "--model", args.model,
+            "--batch-sizes", *map(str, args.batch_sizes),
+            "--encode-texts", str(args.encode_texts),
+            "--embed-requests", str(args.embed_requests),
+            "--seed", str(args.seed),
+            "--store",
+        ]))
+    finally:
+        process.terminate()
+        process.wait()
+
+    output = args.output
+    if not output:
+        stamp = results["meta"]["timestamp"].replace(":", "").replace("-", "")
+        output = os.path.join(BENCHMARKS_DIR, "results", f"{stamp}-{results['meta']['git_sha']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    _print_results(results)
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, results, args.tolerance)
+        print_regressions(regressions, args.tolerance)
+        raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
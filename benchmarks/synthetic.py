@@ -0,0 +1,116 @@
+"""Synthetic resumes and jobs, and a stub encoder, for the offline benchmarks.
+
+Everything is derived from a seed, so two runs with the same settings work
+on identical data.
+"""
+import zlib
+
+import numpy as np
+
+SKILLS = [
+    "Python", "Java", "TypeScript", "React", "Node.js", "PostgreSQL", "MongoDB", "Redis", "Kafka", "Docker",
+    "Kubernetes", "AWS", "GCP", "Azure", "Terraform", "Spark", "Airflow", "TensorFlow", "PyTorch", "Go",
+    "Rust", "C++", "GraphQL", "REST APIs", "CI/CD", "Linux", "SQL", "Tableau", "Figma", "Salesforce",
+    "project management", "stakeholder communication", "agile delivery", "data modelling", "unit testing",
+]
+TITLES = [
+    "Software Engineer", "Backend Developer", "Frontend Developer", "Data Engineer", "Data Scientist",
+    "DevOps Engineer", "Site Reliability Engineer", "Product Manager", "QA Engineer", "Machine Learning Engineer",
+    "Engineering Manager", "Solutions Architect", "Business Analyst", "UX Designer", "Support Engineer",
+]
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises", "Vandelay"]
+LOCATIONS = ["Berlin", "London", "Amsterdam", "Paris", "Madrid", "Warsaw", "Lisbon", "Remote"]
+DEGREES = ["BSc Computer Science", "MSc Data Science", "BA Economics", "MEng Software Engineering", "PhD Physics"]
+VERBS = ["built", "designed", "led", "migrated", "optimised", "maintained", "automated", "scaled", "launched"]
+OBJECTS = [
+    "a payments platform", "the data warehouse", "an internal developer portal", "customer-facing APIs",
+    "the search service", "a recommendation engine", "monitoring and alerting", "the mobile backend",
+    "batch ETL pipelines", "a design system", "the CI pipeline", "an event-driven order system",
+]
+
+# Payload fields with a known number of equally likely values, so a filter
+# on value 0 keeps 1/2, 1/10 or 1/100 of the points
+SELECTIVITY_FIELDS = {"bucket_2": 2, "bucket_10": 10, "bucket_100": 100}
+
+
+def _sentences(rng, words):
+    sentences = []
+    count = 0
+    while count < words:
+        sentence = (f"{rng.choice(VERBS).capitalize()} {rng.choice(OBJECTS)} using "
+                    f"{rng.choice(SKILLS)} and {rng.choice(SKILLS)}.")
+        sentences.append(sentence)
+        count += len(sentence.split())
+    return " ".join(sentences)
+
+
+def _buckets(index):
+    return {field: index % cardinality for field, cardinality in SELECTIVITY_FIELDS.items()}
+
+
+def resume(rng, index, words=120):
+    return {
+        "sections": {
+            "skills": ", ".join(rng.choice(SKILLS, size=8, replace=False)),
+            "experience": f"{rng.choice(TITLES)} at {rng.choice(COMPANIES)}. " + _sentences(rng, words),
+            "education": f"{rng.choice(DEGREES)}, graduated {rng.integers(1995, 2024)}.",
+        },
+        "metadata": {"resume_id": f"resume-{index}", "location": str(rng.choice(LOCATIONS)), **_buckets(index)},
+    }
+
+
+def job(rng, index, words=120):
+    return {
+        "sections": {
+            "title": str(rng.choice(TITLES)),
+            "requirements": ", ".join(rng.choice(SKILLS, size=6, replace=False)),
+            "description": f"{rng.choice(COMPANIES)} is hiring in {rng.choice(LOCATIONS)}. " + _sentences(rng, words),
+        },
+        "metadata": {
+            "job_id": f"job-{index}",
+            "company": str(rng.choice(COMPANIES)),
+            "location": str(rng.choice(LOCATIONS)),
+            **_buckets(index),
+        },
+    }
+
+
+def corpus(entity_type, size, seed=0, words=120):
+    """``size`` synthetic records shaped like ``/api/embed`` bodies (without ``entity_type``)."""
+    rng = np.random.default_rng(seed)
+    make = resume if entity_type == "resume" else job
+    return [make(rng, index, words) for index in range(size)]
+
+
+class StubEncoder:
+    """Deterministic stand-in for a SentenceTransformer.
+
+    Words are hashed into ``buckets`` counts that a fixed random matrix
+    projects to ``dim`` unit-length dimensions, one matrix product per batch,
+    so equal texts get equal vectors, similar texts similar ones, and the
+    cost grows with batch size much like a small dense model's.
+    """
+
+    def __init__(self, dim=768, buckets=4096, max_seq_length=384, seed=0):
+        self.dim = dim
+        self.buckets = buckets
+        self.max_seq_length = max_seq_length
+        self.tokenizer = None
+        rng = np.random.default_rng(seed)
+        self._projection = (rng.standard_normal((buckets, dim)) / np.sqrt(dim)).astype(np.float32)
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, **kwargs):
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        batches = []
+        for start in range(0, len(texts), max(batch_size, 1)):
+            batch = texts[start:start + batch_size]
+            counts = np.zeros((len(batch), self.buckets), dtype=np.float32)
+            for row, text in enumerate(batch):
+                for word in text.lower().split()[:self.max_seq_length]:
+                    counts[row, zlib.crc32(word.encode("utf-8")) % self.buckets] += 1.0
+            vectors = counts @ self._projection
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            batches.append(vectors / np.maximum(norms, 1e-12))
+        if not batches:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.concatenate(batches)
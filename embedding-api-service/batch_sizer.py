@@ -0,0 +1,80 @@
+import os
+import threading
+
+
+def current_rss():
+    """Resident set size of this process in bytes, or None where unsupported."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class AdaptiveBatchSizer:
+    """Steer the encode batch size toward a target latency per batch.
+
+    After every batch ``record`` rescales the size by how far the batch was
+    from ``target_latency_ms`` (at most halving or doubling per step), within
+    ``min_size`` and ``max_size``. When ``max_rss_bytes`` is set and the
+    process is above it, the size is halved instead and never grows.
+    ``shrink(failed_size)`` halves it right away after running out of memory
+    and caps it below ``failed_size``. Every ``recovery_batches`` full batches
+    without another failure (and under ``max_rss_bytes``) lift that cap by a
+    quarter, until it is back at ``max_size``.
+    """
+
+    def __init__(self, initial_size=16, min_size=1, max_size=256, target_latency_ms=250.0, max_rss_bytes=0,
+                 recovery_batches=16):
+        self.min_size = max(min_size, 1)
+        self.max_size = max(max_size, self.min_size)
+        self.target = target_latency_ms / 1000.0
+        self.max_rss_bytes = max_rss_bytes
+        self.recovery_batches = max(recovery_batches, 1)
+        self._ceiling = self.max_size
+        self._successes = 0
+        self._size = min(max(initial_size, self.min_size), self.max_size)
+        self._lock = threading.Lock()
+        self.last_latency = None
+        self.last_rss = None
+
+    @property
+    def size(self):
+        return self._size
+
+    def record(self, batch_size, seconds):
+        rss = current_rss() if self.max_rss_bytes else None
+        with self._lock:
+            self.last_latency = seconds
+            self.last_rss = rss
+            if rss is not None and rss > self.max_rss_bytes:
+                self._resize(self._size // 2)
+                return
+            if seconds <= 0 or batch_size < self._size:
+                # A short tail batch says little about the current size
+                return
+            self._successes += 1
+            if self._ceiling < self.max_size and self._successes >= self.recovery_batches:
+                self._successes = 0
+                self._ceiling = min(self._ceiling + max(self._ceiling // 4, 1), self.max_size)
+            scale = min(max(self.target / seconds, 0.5), 2.0)
+            if 0.8 <= scale <= 1.25:
+                return
+            self._resize(int(self._size * scale))
+
+    def shrink(self, failed_size=None):
+        with self._lock:
+            failed_size = min(failed_size or self._size, self._size)
+            self._ceiling = max(failed_size - 1, self.min_size)
+            self._successes = 0
+            self._resize(failed_size // 2)
+
+    def stats(self):
+        return {
+            "batch_size": self._size,
+            "last_batch_seconds": self.last_latency,
+            "rss_bytes": self.last_rss,
+        }
+
+    def _resize(self, size):
+        self._size = min(max(size, self.min_size), self._ceiling)
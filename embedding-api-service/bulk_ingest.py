@@ -0,0 +1,177 @@
+import json
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from vector_store_writer import entity_id, point_id
+
+
+class BulkIngest:
+    """Stream NDJSON records into the vector store.
+
+    Each input line is one record shaped like an ``/api/embed`` body,
+    ``{"sections": {...}, "metadata": {...}}``. Records are read lazily in
+    chunks of ``chunk_size``; every chunk's sections are encoded with one
+    ``encode_fn`` call and posted through ``writer.post`` on a pool of
+    ``parallel`` threads, so at most ``parallel`` chunks are in flight and
+    memory stays flat whatever the input size. ``fingerprint_fn(text, payload)``
+    gives the ``content_hash`` stored with each section; with ``text_field``
+    the section text is stored in the payload too.
+
+    ``offset`` counts input lines. Only lines whose points have been stored
+    are counted, so ``run(lines, offset=checkpoint)`` picks up where a failed
+    or interrupted run stopped. With ``checkpoint_path`` the offset is also
+    written to that file after every chunk and read back when no offset is
+    given.
+    """
+
+    def __init__(self, encode_fn, fingerprint_fn, writer, entity_type, chunk_size=256, parallel=4,
+                 checkpoint_path=None, text_field=None):
+        self.encode_fn = encode_fn
+        self.fingerprint_fn = fingerprint_fn
+        self.writer = writer
+        self.entity_type = entity_type
+        self.chunk_size = max(chunk_size, 1)
+        self.parallel = max(parallel, 1)
+        self.checkpoint_path = checkpoint_path
+        self.text_field = text_field
+
+    def run(self, lines, offset=None):
+        """Ingest ``lines`` and yield a progress dict after each stored chunk."""
+        if offset is None:
+            offset = self._read_checkpoint()
+        stats = {"offset": offset, "records": 0, "points": 0, "failed": 0}
+        started = time.monotonic()
+
+        in_flight = {}  # future -> chunk end offset
+        finished = set()
+        pending_ends = []  # chunk end offsets in input order, for the checkpoint
+
+        with ThreadPoolExecutor(max_workers=self.parallel, thread_name_prefix="bulk-ingest") as pool:
+            try:
+                for end, chunk in self._chunks(lines, offset, stats):
+                    while len(in_flight) >= self.parallel:
+                        yield self._collect(in_flight, finished, pending_ends, stats, started)
+                    points = self._encode_chunk(chunk, stats)
+                    if points is None:
+                        finished.add(end)
+                        pending_ends.append(end)
+                        continue
+                    future = pool.submit(self.writer.post, self.entity_type, *points)
+                    in_flight[future] = end
+                    pending_ends.append(end)
+                while in_flight:
+                    yield self._collect(in_flight, finished, pending_ends, stats, started)
+                self._advance(finished, pending_ends, stats)
+            except Exception:
+                for future in in_flight:
+                    future.cancel()
+                raise
+
+        yield self._progress(stats, started, done=True)
+
+    def _chunks(self, lines, offset, stats):
+        chunk = []
+        line_number = 0
+        for line_number, line in enumerate(lines, start=1):
+            if line_number <= offset:
+                continue
+            if isinstance(line, bytes):
+                line = line.decode("utf-8")
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict) or not record.get("sections"):
+                    raise ValueError("record has no 'sections'")
+                chunk.append(record)
+            except ValueError as e:
+                stats["failed"] += 1
+                logging.error(f"Skipping {self.entity_type} record on line {line_number}: {e}")
+            if len(chunk) >= self.chunk_size:
+                yield line_number, chunk
+                chunk = []
+        if chunk or line_number > offset:
+            yield max(line_number, offset), chunk
+
+    def _encode_chunk(self, records, stats):
+        texts = []
+        owners = []
+        entity_ids = []
+        for record in records:
+            record_id = entity_id(self.entity_type, record.get("metadata", {})) or str(uuid.uuid4())
+            entity_ids.append(record_id)
+            for section_name, text in record["sections"].items():
+                text = text if isinstance(text, str) else str(text)
+                payload = {"section": section_name, **record.get("metadata", {}), f"{self.entity_type}_id": record_id}
+                if self.text_field:
+                    payload[self.text_field] = text
+                payload["content_hash"] = self.fingerprint_fn(text, payload)
+                texts.append(text)
+                owners.append((record_id, section_name, payload))
+        if not texts:
+            return None
+
+        vectors = self.encode_fn(texts)
+
+        ids, kept, payloads = [], [], []
+        for (record_id, section_name, payload), vector in zip(owners, vectors):
+            if vector is None:
+                stats["failed"] += 1
+                logging.error(f"Failed to generate embedding for section: {section_name}")
+                continue
+            ids.append(point_id(self.entity_type, record_id, section_name))
+            kept.append(vector)
+            payloads.append(payload)
+
+        stats["records"] += len(records)
+        stats["points"] += len(ids)
+        if not ids:
+            return None
+        return entity_ids, ids, kept, payloads
+
+    def _collect(self, in_flight, finished, pending_ends, stats, started):
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            end = in_flight.pop(future)
+            future.result()  # a chunk that failed all retries stops the run
+            finished.add(end)
+        self._advance(finished, pending_ends, stats)
+        return self._progress(stats, started)
+
+    def _advance(self, finished, pending_ends, stats):
+        # The checkpoint only moves past chunks that are stored, in input order
+        moved = False
+        while pending_ends and pending_ends[0] in finished:
+            end = pending_ends.pop(0)
+            finished.discard(end)
+            stats["offset"] = end
+            moved = True
+        if moved:
+            self._write_checkpoint(stats["offset"])
+
+    def _progress(self, stats, started, done=False):
+        elapsed = time.monotonic() - started
+        return {
+            **stats,
+            "elapsed": round(elapsed, 3),
+            "records_per_sec": round(stats["records"] / elapsed, 1) if elapsed else 0.0,
+            "points_per_sec": round(stats["points"] / elapsed, 1) if elapsed else 0.0,
+            "done": done,
+        }
+
+    def _read_checkpoint(self):
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return 0
+        with open(self.checkpoint_path) as f:
+            return int(f.read().strip() or 0)
+
+    def _write_checkpoint(self, offset):
+        if not self.checkpoint_path:
+            return
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(str(offset))
+        os.replace(tmp_path, self.checkpoint_path)
@@ -0,0 +1,57 @@
+import numpy as np
+
+POOLING_METHODS = ("mean", "max")
+
+
+def token_lengths(tokenizer, texts):
+    """Token count of each text, or its character count without a tokenizer."""
+    if tokenizer is None or not texts:
+        return [len(text) for text in texts]
+    encoded = tokenizer(list(texts), add_special_tokens=False, truncation=False)
+    return [len(ids) for ids in encoded["input_ids"]]
+
+
+def split_text(tokenizer, text, max_tokens, overlap, max_chunks):
+    """Split ``text`` into windows of at most ``max_tokens`` tokens.
+
+    Consecutive windows share ``overlap`` tokens and at most ``max_chunks``
+    are returned. Windows are cut from the original text at token offsets,
+    so nothing is lost to decoding. Without a (fast) tokenizer whitespace
+    separated words stand in for tokens.
+    """
+    spans = _token_spans(tokenizer, text)
+    if len(spans) <= max_tokens:
+        return [text]
+
+    step = max(max_tokens - overlap, 1)
+    chunks = []
+    for start in range(0, len(spans), step):
+        window = spans[start:start + max_tokens]
+        chunks.append(text[window[0][0]:window[-1][1]])
+        if start + max_tokens >= len(spans) or len(chunks) >= max_chunks:
+            break
+    return chunks
+
+
+def _token_spans(tokenizer, text):
+    if tokenizer is not None and getattr(tokenizer, "is_fast", False):
+        encoded = tokenizer(text, add_special_tokens=False, truncation=False, return_offsets_mapping=True)
+        return [span for span in encoded["offset_mapping"] if span[1] > span[0]]
+
+    spans = []
+    position = 0
+    for word in text.split():
+        start = text.index(word, position)
+        position = start + len(word)
+        spans.append((start, position))
+    return spans
+
+
+def pool(vectors, method="mean"):
+    """Pool chunk embeddings into one unit-length vector."""
+    if method not in POOLING_METHODS:
+        raise ValueError(f"Unknown pooling '{method}', expected one of {', '.join(POOLING_METHODS)}")
+    matrix = np.asarray(vectors, dtype=np.float32)
+    pooled = matrix.mean(axis=0) if method == "mean" else matrix.max(axis=0)
+    norm = np.linalg.norm(pooled)
+    return pooled / norm if norm > 0 else pooled
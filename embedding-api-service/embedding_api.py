@@ -1,112 +1,491 @@
+import time
+
+import_started = time.perf_counter()
+
+import atexit
+import json
 import logging
 import os
+import queue
 import sys
+import threading
 import traceback
 import uuid
-import torch
+import numpy as np
 import flask
-from flask import request, jsonify
+from flask import Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
-from sentence_transformers import SentenceTransformer
+import metrics
+from batch_sizer import AdaptiveBatchSizer
+from bulk_ingest import BulkIngest
+from chunking import POOLING_METHODS, pool, split_text, token_lengths
+from embedding_cache import EmbeddingCache, content_hash
+from micro_batcher import MicroBatcher
+from model_backend import SAMPLE_TEXTS, load_model
+from profiler import SamplingProfiler
+from vector_codec import BASE64_FLOAT32, VECTOR_ENCODING_HEADER, encode_vectors, negotiate
+from vector_store_writer import VectorStoreWriter, entity_id as metadata_entity_id, point_id
+
+def _env_number(name, default, cast=int):
+    value = os.environ.get(name, "")
+    return cast(value) if value else default
+
 
-device = 'cuda' if torch.cuda.is_available() else 'cpu'
-embd = SentenceTransformer('all-mpnet-base-v2', device=device)
+model_name = os.environ.get("EMBEDDING_MODEL", "all-mpnet-base-v2")
+
+# EMBEDDING_BACKEND is "torch", "onnx" or "onnx-int8" (see model_backend.py);
+# EMBEDDING_NUM_THREADS caps the intra-op threads of either runtime.
+backend = os.environ.get("EMBEDDING_BACKEND", "torch").lower()
+
+# The model is loaded by start() (or the first request needing it), not at
+# import, and EMBEDDING_WARMUP runs a sample batch through it before /readyz
+# reports ready.
+warmup_enabled = os.environ.get("EMBEDDING_WARMUP", "true").lower() in ("1", "true", "yes")
+_model = None
+_model_lock = threading.Lock()
+startup = {"ready": False, "error": None, "import_seconds": None, "load_seconds": None,
+           "warmup_seconds": None, "ready_seconds": None}
 # logging.basicConfig(level=logging.DEBUG)
 
 app = flask.Flask(__name__)
 CORS(app)
 
-main_batch_size = os.environ.get("BATCH_SIZE", "16")
-main_batch_size = int(main_batch_size) if main_batch_size else 16
 
+# Encode batches start at BATCH_SIZE texts and are resized between
+# MIN_BATCH_SIZE and MAX_ENCODE_BATCH_SIZE so one batch takes about
+# BATCH_TARGET_LATENCY_MS. With ENCODE_MAX_RSS_BYTES set, batches shrink
+# while the process uses more memory than that.
+main_batch_size = _env_number("BATCH_SIZE", 16)
+min_batch_size = _env_number("MIN_BATCH_SIZE", 1)
+max_encode_batch_size = _env_number("MAX_ENCODE_BATCH_SIZE", 256)
+batch_target_latency_ms = _env_number("BATCH_TARGET_LATENCY_MS", 250.0, float)
+encode_max_rss_bytes = _env_number("ENCODE_MAX_RSS_BYTES", 0)
+
+# Concurrent requests are coalesced for up to BATCH_WINDOW_MS, until
+# MAX_BATCH_SIZE texts are pending or no other request is waiting, before a
+# single encode runs.
+batch_window_ms = _env_number("BATCH_WINDOW_MS", 10.0, float)
+max_batch_size = _env_number("MAX_BATCH_SIZE", 64)
+
+# Vectors from different backends differ slightly, so cached embeddings and
+# stored section fingerprints are keyed by model and backend.
+model_key = model_name if backend == "torch" else f"{model_name}:{backend}"
+
+# Embeddings are cached by model, backend and normalized text. EMBED_CACHE_DIR
+# enables the memory-mapped tier that survives restarts.
+embedding_cache = EmbeddingCache(
+    model_key,
+    max_bytes=_env_number("EMBED_CACHE_MAX_BYTES", 256 * 1024 * 1024),
+    disk_dir=os.environ.get("EMBED_CACHE_DIR") or None,
+    disk_entries=_env_number("EMBED_CACHE_DISK_ENTRIES", 200000)
+)
+atexit.register(embedding_cache.flush)
+
+vector_store_writer = VectorStoreWriter(
+    os.environ.get("VECTOR_STORE_URL", "http://vector_store:5200"),
+    flush_size=_env_number("VECTOR_STORE_FLUSH_SIZE", 256),
+    flush_interval_ms=_env_number("VECTOR_STORE_FLUSH_INTERVAL_MS", 50.0, float),
+    max_queue=_env_number("VECTOR_STORE_QUEUE_SIZE", 1024),
+    max_retries=_env_number("VECTOR_STORE_MAX_RETRIES", 3),
+    pool_size=_env_number("VECTOR_STORE_POOL_SIZE", 4),
+    wire_encoding=os.environ.get("VECTOR_STORE_WIRE_ENCODING", BASE64_FLOAT32)
+)
+vector_store_wait_timeout = _env_number("VECTOR_STORE_WAIT_TIMEOUT", 60.0, float)
+# Points already acknowledged to clients are flushed before the process exits
+atexit.register(vector_store_writer.close)
+
+# With a pooling method ("mean" or "max", per request or CHUNK_POOLING by
+# default) texts longer than the model's max sequence length are embedded as
+# windows overlapping by CHUNK_OVERLAP tokens, at most CHUNK_MAX_CHUNKS of
+# them, and pooled. Without one they are truncated by the model.
+default_pooling = os.environ.get("CHUNK_POOLING", "").lower() or None
+chunk_overlap = _env_number("CHUNK_OVERLAP", 32)
+chunk_max_chunks = _env_number("CHUNK_MAX_CHUNKS", 16)
+
+# Sections whose text and metadata match the fingerprint stored with their
+# point are not encoded or written again. The lookup gives up after
+# VECTOR_STORE_LOOKUP_TIMEOUT seconds and then everything is embedded.
+skip_unchanged_sections = os.environ.get("SKIP_UNCHANGED_SECTIONS", "true").lower() in ("1", "true", "yes")
+vector_store_lookup_timeout = _env_number("VECTOR_STORE_LOOKUP_TIMEOUT", 2.0, float)
+
+# Each point stores its section text under SECTION_TEXT_FIELD, which the
+# vector store's rerank endpoints score against; set it empty to store none.
+section_text_field = os.environ.get("SECTION_TEXT_FIELD", "text") or None
+
+# Bulk ingest reads BULK_INGEST_CHUNK_SIZE records at a time, encodes them in
+# batches starting at BULK_INGEST_BATCH_SIZE and keeps BULK_INGEST_PARALLEL upserts in
+# flight. Server-side files can only be ingested from BULK_INGEST_DIR.
+bulk_ingest_chunk_size = _env_number("BULK_INGEST_CHUNK_SIZE", 256)
+bulk_ingest_batch_size = _env_number("BULK_INGEST_BATCH_SIZE", 64)
+bulk_ingest_parallel = _env_number("BULK_INGEST_PARALLEL", 4)
+bulk_ingest_dir = os.environ.get("BULK_INGEST_DIR") or None
+
+# PROFILER_ENABLED exposes /debug/profiler/start and /debug/profiler/stop,
+# which sample the stacks of this worker for a flame graph.
+profiler_enabled = os.environ.get("PROFILER_ENABLED", "false").lower() in ("1", "true", "yes")
+profiler = SamplingProfiler()
+
+
+def _batch_sizer(initial_size):
+    return AdaptiveBatchSizer(
+        initial_size,
+        min_size=min_batch_size,
+        max_size=max_encode_batch_size,
+        target_latency_ms=batch_target_latency_ms,
+        max_rss_bytes=encode_max_rss_bytes
+    )
+
+
+def dynamic_batch_encode(model, sentences, sizer):
+    """Encode ``sentences`` in batches sized by ``sizer``, returning None for texts that fail."""
+    # Batch texts of similar token length, longest first, so each batch only
+    # pads to its own longest text; embeddings go back in input order below.
+    with metrics.timed("tokenize"):
+        lengths = token_lengths(getattr(model, "tokenizer", None), sentences)
+    order = np.argsort([-length for length in lengths], kind="stable")
+    sentences = [sentences[j] for j in order]
 
-def dynamic_batch_encode(model, sentences, initial_batch_size, min_batch_size=1):
-    batch_size = initial_batch_size
     embeddings = []
     i = 0
 
     while i < len(sentences):
+        batch = sentences[i:i + sizer.size]
+        started = time.perf_counter()
         try:
-            batch_embeddings = model.encode(sentences[i:i + batch_size], batch_size=batch_size)
-            embeddings.extend(batch_embeddings.tolist())
-            i += batch_size
-        except RuntimeError as e:
-            if 'CUDA out of memory' in str(e):
-                print(f"CUDA OOM error with batch size {batch_size}, reducing...", file=sys.stderr)
-                torch.cuda.empty_cache()
-                batch_size = max(min_batch_size, batch_size // 2)
+            embeddings.extend(_encode_isolating(model, batch))
+        except Exception as e:
+            # Out of memory: retry the rest with a smaller batch
+            if len(batch) > 1 and sizer.size > sizer.min_size:
+                logging.warning(f"Out of memory encoding {len(batch)} texts, shrinking the batch: {e}")
+                sizer.shrink(len(batch))
             else:
-                raise e
-        except Exception:
-            embeddings.extend([embed_single_text(im) for im in sentences[i:i + batch_size]])
+                logging.error(f"Out of memory encoding a single text: {e}")
+                embeddings.extend([None] * len(batch))
+                i += len(batch)
+            _release_memory()
+            continue
+        elapsed = time.perf_counter() - started
+        sizer.record(len(batch), elapsed)
+        metrics.STAGE_SECONDS.labels("forward").observe(elapsed)
+        metrics.ENCODE_BATCH_SIZE.observe(len(batch))
+        i += len(batch)
+
+    restored = [None] * len(embeddings)
+    for position, j in enumerate(order):
+        restored[j] = embeddings[position]
+    return restored
+
+
+def _encode_isolating(model, texts):
+    """Encode ``texts``; when the batch fails, bisect it so only the failing texts get None.
+
+    Out-of-memory errors are raised instead, since a smaller batch may pass.
+    """
+    try:
+        return list(model.encode(texts, batch_size=len(texts), convert_to_numpy=True).astype(np.float32, copy=False))
+    except Exception as e:
+        if _is_out_of_memory(e):
+            raise
+        if len(texts) == 1:
+            logging.error(f"Failed to encode text: {traceback.format_exc()}")
+            return [None]
+        middle = len(texts) // 2
+        return _encode_isolating(model, texts[:middle]) + _encode_isolating(model, texts[middle:])
+
+
+# How each backend reports running out of memory: MemoryError from Python and
+# NumPy, torch.OutOfMemoryError / torch.cuda.OutOfMemoryError on CUDA, torch's
+# CPU allocator ("DefaultCPUAllocator: can't allocate memory ... (Cannot
+# allocate memory)") and ONNX Runtime ("Failed to allocate memory").
+OUT_OF_MEMORY_MESSAGES = ("out of memory", "can't allocate memory", "cannot allocate memory",
+                          "failed to allocate memory")
+
+
+def _is_out_of_memory(error):
+    if isinstance(error, MemoryError):
+        return True
+    # torch is only checked once a backend has imported it
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        error_types = (
+            getattr(torch, "OutOfMemoryError", None),
+            getattr(getattr(torch, "cuda", None), "OutOfMemoryError", None)
+        )
+        error_types = tuple(error_type for error_type in error_types if isinstance(error_type, type))
+        if error_types and isinstance(error, error_types):
+            return True
+    message = str(error).lower()
+    return any(text in message for text in OUT_OF_MEMORY_MESSAGES)
 
-    return embeddings
 
+def _release_memory():
+    import torch
+
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+def get_model():
+    """The embedding model, loaded on first use."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                import torch
+
+                started = time.perf_counter()
+                _model = load_model(
+                    model_name,
+                    backend,
+                    device='cuda' if torch.cuda.is_available() else 'cpu',
+                    num_threads=_env_number("EMBEDDING_NUM_THREADS", 0),
+                    export_dir=os.environ.get("ONNX_EXPORT_DIR") or None,
+                    quantization_config=os.environ.get("ONNX_QUANTIZATION_CONFIG", "avx2")
+                )
+                startup["load_seconds"] = round(time.perf_counter() - started, 3)
+                print(f"Loaded {model_name} ({backend}) in {startup['load_seconds']:.2f}s", flush=True)
+    return _model
+
+
+def warmup():
+    """Encode a representative batch so the first request does not pay for allocations and kernel setup."""
+    started = time.perf_counter()
+    texts = (SAMPLE_TEXTS * (main_batch_size // len(SAMPLE_TEXTS) + 1))[:max(main_batch_size, 1)]
+    model = get_model()
+    # A throwaway sizer, so warmup timings do not steer the real batch size
+    dynamic_batch_encode(model, texts, _batch_sizer(len(texts)))
+    dynamic_batch_encode(model, texts[:1], _batch_sizer(1))
+    startup["warmup_seconds"] = round(time.perf_counter() - started, 3)
+
+
+def _load_and_warm():
+    try:
+        get_model()
+        if warmup_enabled:
+            warmup()
+    except Exception as e:
+        logging.error(f"Could not load the embedding model: {traceback.format_exc()}")
+        startup["error"] = str(e) or type(e).__name__
+        return
+    startup["ready_seconds"] = round(time.perf_counter() - import_started, 3)
+    startup["ready"] = True
+    print(f"Embedding API ready {startup['ready_seconds']:.2f}s after import "
+          f"(load {startup['load_seconds']}s, warmup {startup['warmup_seconds']}s)", flush=True)
+
+
+def start(background=True):
+    """Load and warm up the model, in a background thread unless ``background`` is false.
+
+    Call it in the serving process after any fork (gunicorn.conf.py does).
+    """
+    if not background:
+        _load_and_warm()
+        return None
+    thread = threading.Thread(target=_load_and_warm, name="model-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def _encode_micro_batch(texts):
+    metrics.MICRO_BATCH_SIZE.observe(len(texts))
+    return dynamic_batch_encode(get_model(), texts, batch_sizer)
+
+
+batch_sizer = _batch_sizer(main_batch_size)
+batcher = MicroBatcher(_encode_micro_batch, window_ms=batch_window_ms, max_batch_size=max_batch_size)
+
+
+def encode_texts(texts, pooling=None):
+    """Return one float32 embedding (or None) per text, sending only cache misses to the model.
+
+    With ``pooling`` long texts are embedded in chunks and pooled (see ``_encode_chunked``).
+    """
+    if pooling:
+        return _encode_chunked(texts, pooling)
+
+    vectors = embedding_cache.get_many(texts)
+    hits = sum(vector is not None for vector in vectors)
+    metrics.CACHE_LOOKUPS.labels("hit").inc(hits)
+    metrics.CACHE_LOOKUPS.labels("miss").inc(len(vectors) - hits)
+
+    missing = {}
+    for i, (text, vector) in enumerate(zip(texts, vectors)):
+        if vector is None:
+            missing.setdefault(text, []).append(i)
+
+    if missing:
+        fresh = batcher.encode(list(missing))
+        embedding_cache.put_many(list(missing), fresh)
+        for positions, vector in zip(missing.values(), fresh):
+            for i in positions:
+                vectors[i] = vector
+
+    return vectors
+
+
+def _encode_chunked(texts, pooling):
+    model = get_model()
+    max_tokens = (getattr(model, "max_seq_length", None) or 512) - 2  # room for the special tokens
+    tokenizer = getattr(model, "tokenizer", None)
+    with metrics.timed("tokenize"):
+        chunked = [
+            split_text(tokenizer, text, max_tokens, min(chunk_overlap, max_tokens - 1), chunk_max_chunks)
+            for text in texts
+        ]
+    flat = encode_texts([chunk for chunks in chunked for chunk in chunks])
+
+    vectors = []
+    i = 0
+    for chunks in chunked:
+        parts = [vector for vector in flat[i:i + len(chunks)] if vector is not None]
+        i += len(chunks)
+        if len(chunks) == 1:
+            vectors.append(parts[0] if parts else None)
+        else:
+            vectors.append(pool(parts, pooling) if parts else None)
+    return vectors
+
+
+def _pooling_arg(data):
+    """The request's pooling method, or raise ValueError for an unknown one."""
+    pooling = data.get("pooling", default_pooling)
+    pooling = pooling.lower() if isinstance(pooling, str) and pooling else None
+    if pooling is not None and pooling not in POOLING_METHODS:
+        raise ValueError(f"Invalid 'pooling', expected one of {', '.join(POOLING_METHODS)}")
+    return pooling
+
+
+def _json_body():
+    with metrics.timed("json_decode"):
+        return request.get_json()
+
+
+def encode_for_response(vectors, encoding):
+    """Encode a list of embeddings as one matrix, keeping None for failed texts."""
+    if all(vector is not None for vector in vectors):
+        return encode_vectors(np.stack(vectors) if vectors else np.zeros((0, 0), np.float32), encoding)
+    return [encode_vectors(vector, encoding) if vector is not None else None for vector in vectors]
 
-import requests  # Add this import to make HTTP requests to the vector store
 
 @app.route("/api/embed", methods=["POST"])
 def get_embeddings():
-    data = request.get_json()
+    data = _json_body()
     
     # Extract sections and entity type (job or resume) from the request
     entity_type = data.get("entity_type")
     sections = data.get("sections", {})
     metadata = data.get("metadata", {})
+    encoding = negotiate(request.headers.get(VECTOR_ENCODING_HEADER))
     
     if not entity_type or not sections:
         return jsonify({"error": "Invalid request, 'entity_type' and 'sections' are required"}), 400
+    try:
+        pooling = _pooling_arg(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
+    # Point ids derive from the entity id and section, so re-embedding an
+    # entity overwrites its points. The id is also stored as "<type>_id" for
+    # updates and deletes; entities without one get a random id.
+    entity_id = metadata_entity_id(entity_type, metadata)
+    stored = stored_sections(entity_type, entity_id, sections) if entity_id else {}
+    entity_id = entity_id or str(uuid.uuid4())
+
     result = {}
+    skipped = 0  # Sections left as stored
     ids = []  # List of unique IDs for Qdrant points
     vectors = []  # Embedding vectors
     payloads = []  # Payloads for each embedding
 
+    pending = []  # (section name, point id, payload, text) of sections to encode
     for section_name, text in sections.items():
         if not isinstance(text, str):
             text = str(text)
-        
-        embedding = embed_single_text(text)
-        if embedding:
-            # Use the appropriate ID (resume_id or job_id) depending on entity_type
-            unique_id = str(uuid.uuid4())
-            ids.append(unique_id)  # Use job_id or resume_id + section name as the unique ID
+
+        unique_id = point_id(entity_type, entity_id, section_name)
+        payload = {
+            "section": section_name,
+            **metadata,  # Add all metadata from the request
+            f"{entity_type}_id": entity_id
+        }
+        if section_text_field:
+            payload[section_text_field] = text
+        # Chunked and truncated embeddings of a text differ, so the pooling is fingerprinted too
+        payload["content_hash"] = content_hash(model_key, text, {**payload, "pooling": pooling} if pooling else payload)
+
+        previous = stored.get(unique_id)
+        if previous is not None and previous["content_hash"] == payload["content_hash"]:
+            skipped += 1
+            result[section_name] = previous["vector"]
+            continue
+        pending.append((section_name, unique_id, payload, text))
+
+    # All changed sections go to the model in one call
+    try:
+        embeddings = encode_texts([text for _, _, _, text in pending], pooling) if pending else []
+    except Exception:
+        logging.error(traceback.format_exc())
+        embeddings = [None] * len(pending)
+
+    for (section_name, unique_id, payload, text), embedding in zip(pending, embeddings):
+        if embedding is not None:
+            ids.append(unique_id)
             vectors.append(embedding)
-            payloads.append({
-                "section": section_name,
-                **metadata  # Add all metadata from the request
-            })
-            print(f"Payloads: ${payloads}")
+            payloads.append(payload)
             result[section_name] = embedding
         else:
             logging.error(f"Failed to generate embedding for section: {section_name} | Text: {text}")
+    result = {section_name: result[section_name] for section_name in sections if section_name in result}
 
+    # Points are buffered and flushed to the vector store in bulk; callers
+    # that need durability pass wait=true to block until the upsert lands.
+    wait = _is_truthy(request.args.get("wait", data.get("wait", False)))
     try:
-        response = requests.post(f"http://vector_store:5200/{entity_type}/add", json={
-            f"{entity_type}_id": metadata.get(f"{entity_type}_id", "unknown"),
-            "ids": ids,  # New Field: IDs for Qdrant
-            "vectors": vectors,  # New Field: Embedding vectors for Qdrant
-            "payloads": payloads  # New Field: Payloads for Qdrant
-        })
-        
-        if response.status_code != 200:
-            logging.error(f"Failed to store embedding in vector store. Status: {response.status_code} | Response: {response.json()}")
+        write = vector_store_writer.submit(
+            entity_type,
+            entity_id,
+            ids,
+            vectors,
+            payloads
+        )
+    except queue.Full:
+        logging.error("Vector store write queue is full, rejecting request")
+        return jsonify({"error": "Vector store write queue is full, retry later"}), 503
+    metrics.SKIPPED_SECTIONS.inc(skipped)
+
+    if wait:
+        try:
+            write.result(timeout=vector_store_wait_timeout)
+        except Exception as e:
+            logging.error(f"Failed to store embedding in vector store: {str(e)}")
             return jsonify({"error": "Failed to add embeddings to vector store"}), 500
 
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Exception during request to vector store: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    with metrics.timed("serialize"):
+        result = {section_name: encode_vectors(vector, encoding) for section_name, vector in result.items()}
+        return jsonify({"entity_type": entity_type, "embeddings": result, "stored": wait, "skipped_sections": skipped})
 
-    return jsonify({"entity_type": entity_type, "embeddings": result})
+
+def stored_sections(entity_type, entity_id, sections):
+    """Stored fingerprint and vector per point id of the entity's sections."""
+    if not skip_unchanged_sections:
+        return {}
+    ids = [point_id(entity_type, entity_id, section_name) for section_name in sections]
+    try:
+        return vector_store_writer.fetch_points(entity_type, ids, timeout=vector_store_lookup_timeout)
+    except Exception as e:
+        logging.warning(f"Could not look up stored sections of {entity_type} {entity_id}, embedding all: {e}")
+        return {}
 
 
+def _is_truthy(value):
+    if isinstance(value, str):
+        return value.lower() in ("1", "true", "yes")
+    return bool(value)
 
 
-def embed_single_text(text):
+def embed_single_text(text, pooling=None):
     try:
-        embedding = embd.encode([text])[0].tolist()
-        # print(embedding)
-        return embedding
+        return encode_texts([text], pooling)[0]
     except Exception:
         logging.error(traceback.format_exc())
         return None
@@ -114,33 +493,173 @@ def embed_single_text(text):
 
 @app.route("/api/batch-embed", methods=["POST"])
 def get_batched_embeddings():
-    data = request.get_json()
+    data = _json_body()
     
     # Extract sections and entity type (job or resume) from the request
     entity_type = data.get("entity_type")  # 'job' or 'resume'
     sections = data.get("sections", {})
+    encoding = negotiate(request.headers.get(VECTOR_ENCODING_HEADER))
     
     if not entity_type or not sections:
         return jsonify({"error": "Invalid request, 'entity_type' and 'sections' are required"}), 400
+    try:
+        pooling = _pooling_arg(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     result = {}
 
     # Generate embeddings for each section
     for section_name, texts in sections.items():
         valid_texts = [x for x in texts if x is not None]
-        embeddings = dynamic_batch_encode(embd, valid_texts, initial_batch_size=main_batch_size)
-        result[section_name] = embeddings
+        result[section_name] = encode_texts(valid_texts, pooling)
 
-    return jsonify({"entity_type": entity_type, "embeddings": result})
+    with metrics.timed("serialize"):
+        result = {section_name: encode_for_response(embeddings, encoding) for section_name, embeddings in result.items()}
+        return jsonify({"entity_type": entity_type, "embeddings": result})
 
 
 @app.route("/api/query-embed", methods=["POST"])
 def get_query_embedding():
-    data = request.get_json()
+    data = _json_body()
     query_text = data.get("query_text", "")
     
     if not query_text:
         return jsonify({"error": "Query text is required"}), 400
+    try:
+        pooling = _pooling_arg(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
         
-    embedding = embed_single_text(query_text)
-    return jsonify({"embedding": embedding})
\ No newline at end of file
+    embedding = embed_single_text(query_text, pooling)
+    with metrics.timed("serialize"):
+        if embedding is not None:
+            embedding = encode_vectors(embedding, negotiate(request.headers.get(VECTOR_ENCODING_HEADER)))
+        return jsonify({"embedding": embedding})
+
+
+# Bulk ingest has its own sizer since its batches start larger. It calls the
+# model from the ingesting request thread, not through the micro-batcher, so
+# a running backfill and interactive encodes share the CPU.
+bulk_batch_sizer = _batch_sizer(bulk_ingest_batch_size)
+
+
+@app.route("/api/bulk-ingest", methods=["POST"])
+def bulk_ingest():
+    """Ingest NDJSON records, one ``/api/embed``-style body per line.
+
+    The records come from the request body, or from ``?path=`` (relative to
+    BULK_INGEST_DIR) on the server, in which case the offset is checkpointed
+    next to the file. Progress is streamed back as NDJSON; pass the last
+    reported ``offset`` back as ``?offset=`` to resume.
+    """
+    entity_type = request.args.get("entity_type")
+    if entity_type not in ("job", "resume"):
+        return jsonify({"error": "Invalid request, 'entity_type' must be 'job' or 'resume'"}), 400
+    offset = request.args.get("offset")
+    if offset:
+        if not offset.isdigit():
+            return jsonify({"error": "Invalid request, 'offset' must be a non-negative integer"}), 400
+        offset = int(offset)
+    else:
+        offset = None
+
+    path = request.args.get("path")
+    checkpoint_path = None
+    if path:
+        if not bulk_ingest_dir:
+            return jsonify({"error": "Ingesting server-side files is disabled, set BULK_INGEST_DIR"}), 400
+        root = os.path.realpath(bulk_ingest_dir)
+        path = os.path.realpath(os.path.join(root, path))
+        if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+            return jsonify({"error": "File not found in BULK_INGEST_DIR"}), 404
+        checkpoint_path = path + ".checkpoint"
+
+    ingest = BulkIngest(
+        lambda texts: dynamic_batch_encode(get_model(), texts, bulk_batch_sizer),
+        lambda text, payload: content_hash(model_key, text, payload),
+        vector_store_writer,
+        entity_type,
+        chunk_size=bulk_ingest_chunk_size,
+        parallel=bulk_ingest_parallel,
+        checkpoint_path=checkpoint_path,
+        text_field=section_text_field
+    )
+
+    def generate():
+        progress = {"offset": offset or 0}
+        try:
+            if path:
+                with open(path, "rb") as lines:
+                    for progress in ingest.run(lines, offset):
+                        yield json.dumps(progress) + "\n"
+            else:
+                for progress in ingest.run(request.stream, offset):
+                    yield json.dumps(progress) + "\n"
+        except Exception as e:
+            logging.error(f"Bulk ingest of {entity_type} records failed: {traceback.format_exc()}")
+            yield json.dumps({**progress, "error": str(e), "done": False}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+# Liveness probe: the process is up and serving
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    return jsonify({"status": "ok"})
+
+
+# Readiness probe: the model is loaded and warmed up
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    return jsonify(startup), 200 if startup["ready"] else 503
+
+
+@app.route("/api/cache-stats", methods=["GET"])
+def get_cache_stats():
+    return jsonify(embedding_cache.stats())
+
+
+@app.before_request
+def _start_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def _record_latency(response):
+    started = g.pop("request_started", None)
+    if started is not None:
+        endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        metrics.REQUEST_SECONDS.labels(endpoint, request.method, str(response.status_code)).observe(
+            time.perf_counter() - started
+        )
+    return response
+
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
+
+
+# Runtime sampling profiler of this worker, off unless PROFILER_ENABLED is set
+@app.route("/debug/profiler/start", methods=["POST"])
+def start_profiler():
+    if not profiler_enabled:
+        return jsonify({"error": "Profiler is disabled, set PROFILER_ENABLED"}), 404
+    interval_ms = request.args.get("interval_ms", 5.0, type=float)
+    max_seconds = request.args.get("max_seconds", 300.0, type=float)
+    if not profiler.start(interval_ms / 1000.0, max_seconds):
+        return jsonify({"error": "Profiler is already running", **profiler.status()}), 409
+    return jsonify(profiler.status())
+
+
+@app.route("/debug/profiler/stop", methods=["POST"])
+def stop_profiler():
+    if not profiler_enabled:
+        return jsonify({"error": "Profiler is disabled, set PROFILER_ENABLED"}), 404
+    return Response(profiler.stop(), mimetype="text/plain")
+
+
+startup["import_seconds"] = round(time.perf_counter() - import_started, 3)
+print(f"Embedding API imported in {startup['import_seconds']:.2f}s", flush=True)
@@ -0,0 +1,214 @@
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+KEY_SIZE = 32  # sha256 digest
+ENTRY_OVERHEAD = 128  # rough per-entry cost of the key, dict slot and array header
+
+
+def normalize_text(text):
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def content_hash(model_name, text, payload=None):
+    """Fingerprint of a stored section: model, normalized text and payload."""
+    digest = hashlib.sha256((model_name + "\0" + normalize_text(text)).encode("utf-8"))
+    if payload:
+        digest.update(b"\0" + json.dumps(payload, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class _DiskTier:
+    """Fixed-capacity ring of vectors in memory-mapped files.
+
+    ``<name>.keys`` holds one digest per slot, ``<name>.vectors`` the float32
+    rows and ``<name>.head`` the next slot to overwrite, so the index can be
+    rebuilt from the files after a restart. The ring has a single writer:
+    the process holding ``<name>.lock``. Opening it while another process
+    (e.g. another gunicorn worker) holds the lock raises ``BlockingIOError``.
+    """
+
+    def __init__(self, directory, name, dim, capacity):
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, name)
+        self._lock_file = open(base + ".lock", "a")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._lock_file.close()
+            raise BlockingIOError(f"{base} is in use by another process")
+        self.dim = dim
+        self.capacity = capacity
+        self._keys = self._open(base + ".keys", np.uint8, (capacity, KEY_SIZE))
+        self._vectors = self._open(base + ".vectors", np.float32, (capacity, dim))
+        self._head = self._open(base + ".head", np.int64, (1,))
+        self._index = {}
+        for slot in np.flatnonzero(self._keys.any(axis=1)):
+            self._index[self._keys[slot].tobytes()] = int(slot)
+
+    @staticmethod
+    def _open(path, dtype, shape):
+        mode = "r+" if os.path.exists(path) else "w+"
+        return np.memmap(path, dtype=dtype, mode=mode, shape=shape)
+
+    def __len__(self):
+        return len(self._index)
+
+    def get(self, key):
+        slot = self._index.get(key)
+        if slot is None:
+            return None
+        return np.array(self._vectors[slot])
+
+    def put(self, key, vector):
+        if key in self._index:
+            return
+        slot = int(self._head[0]) % self.capacity
+        old_key = self._keys[slot].tobytes()
+        if self._index.get(old_key) == slot:
+            del self._index[old_key]
+        self._vectors[slot] = vector
+        self._keys[slot] = np.frombuffer(key, dtype=np.uint8)
+        self._head[0] = slot + 1
+        self._index[key] = slot
+
+    def flush(self):
+        for array in (self._vectors, self._keys, self._head):
+            array.flush()
+
+
+class EmbeddingCache:
+    """Content-addressed embedding cache.
+
+    Entries are keyed by the sha256 of the model name and the normalized text.
+    Lookups hit an in-memory LRU bounded by ``max_bytes`` first and, when
+    ``disk_dir`` is set, a memory-mapped tier that survives restarts.
+    """
+
+    def __init__(self, model_name, max_bytes, disk_dir=None, disk_entries=200000):
+        self.model_name = model_name
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_entries = disk_entries
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk = None
+        self._disk_scanned = False
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+    def key(self, text):
+        payload = self.model_name + "\0" + normalize_text(text)
+        return hashlib.sha256(payload.encode("utf-8")).digest()
+
+    def get_many(self, texts):
+        keys = [self.key(text) for text in texts]
+        with self._lock:
+            found = [self._get(key) for key in keys]
+            hits = sum(vector is not None for vector in found)
+            self.hits += hits
+            self.misses += len(found) - hits
+        return found
+
+    def put_many(self, texts, vectors):
+        keys = [self.key(text) for text in texts]
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                if vector is None:
+                    continue
+                # An owned copy: a row view would keep its whole encode batch
+                # alive while _remember only counts the row's bytes
+                vector = np.array(vector, dtype=np.float32)
+                self._remember(key, vector)
+                disk = self._disk_tier(vector.shape[-1])
+                if disk is not None:
+                    disk.put(key, vector)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(self._disk) if self._disk is not None else 0,
+            }
+
+    def flush(self):
+        with self._lock:
+            if self._disk is not None:
+                self._disk.flush()
+
+    def _get(self, key):
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            return vector
+        if self._disk is None and not self._disk_scanned:
+            # The disk tier is sized on first write; reopen it for lookups
+            # when an earlier process already created it.
+            self._disk_scanned = True
+            self._open_existing_disk_tier()
+        if self._disk is not None:
+            vector = self._disk.get(key)
+            if vector is not None:
+                self.disk_hits += 1
+                self._remember(key, vector)
+                return vector
+        return None
+
+    def _remember(self, key, vector):
+        size = vector.nbytes + ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= previous.nbytes + ENTRY_OVERHEAD
+        self._memory[key] = vector
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes + ENTRY_OVERHEAD
+
+    def _disk_name(self):
+        return re.sub(r"[^A-Za-z0-9_.-]", "_", self.model_name)
+
+    def _disk_tier(self, dim):
+        if not self.disk_dir:
+            return None
+        if self._disk is None or self._disk.dim != dim:
+            name = f"{self._disk_name()}-{dim}"
+            try:
+                self._disk = _DiskTier(self.disk_dir, name, dim, self.disk_entries)
+            except BlockingIOError:
+                logging.info(f"On-disk embedding cache {name} is owned by another worker, using memory only")
+                self.disk_dir = None
+                self._disk = None
+            except (OSError, ValueError):
+                logging.exception(f"Disabling on-disk embedding cache, could not open {name} in {self.disk_dir}")
+                self.disk_dir = None
+                self._disk = None
+        return self._disk
+
+    def _open_existing_disk_tier(self):
+        if not self.disk_dir or not os.path.isdir(self.disk_dir):
+            return
+        prefix = self._disk_name() + "-"
+        for name in os.listdir(self.disk_dir):
+            dim = name[len(prefix):-len(".vectors")]
+            if name.startswith(prefix) and name.endswith(".vectors") and dim.isdigit():
+                self._disk_tier(int(dim))
+                return
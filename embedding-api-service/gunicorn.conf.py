@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+
+# EMBEDDING_WORKERS processes serve the API. With the torch backend the app
+# (and so the model) is loaded once in the master before forking, and the
+# workers share its weights copy-on-write instead of each loading a copy.
+# ONNX Runtime sessions do not survive a fork, so those backends load the
+# model in every worker.
+workers = int(os.environ.get("EMBEDDING_WORKERS") or 1)
+threads = int(os.environ.get("EMBEDDING_THREADS") or 8)
+preload_app = os.environ.get("EMBEDDING_BACKEND", "torch").lower() == "torch"
+
+bind = "0.0.0.0:5500"
+timeout = 72000
+errorlog = "-"
+enable_stdio_inheritance = True
+
+# Split the cores between the workers so their intra-op thread pools do not
+# oversubscribe the CPU; EMBEDDING_NUM_THREADS overrides the share. The app
+# reads it when loading the model, and forked workers inherit the setting.
+cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+os.environ.setdefault("EMBEDDING_NUM_THREADS", str(max(cores // workers, 1)))
+
+# With several workers the Prometheus metrics live in files under
+# PROMETHEUS_MULTIPROC_DIR, so /metrics can add up every worker. The directory
+# is emptied here, before the app (or any worker) writes to it.
+if workers > 1:
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "embedding-metrics"))
+if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+
+def when_ready(server):
+    # When preloading, load the weights in the master so the workers share
+    # them; warmup still runs per worker, after the fork.
+    if preload_app:
+        import embedding_api
+
+        embedding_api.get_model()
+
+
+def post_worker_init(worker):
+    import embedding_api
+
+    embedding_api.start()
+
+
+def worker_exit(server, worker):
+    # Flush the write-behind queue before a restarting or stopping worker exits
+    import embedding_api
+
+    embedding_api.vector_store_writer.close()
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
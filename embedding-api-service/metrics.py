@@ -0,0 +1,57 @@
+"""Prometheus metrics for the embedding API, served at ``/metrics``.
+
+Under gunicorn with several workers PROMETHEUS_MULTIPROC_DIR is set (see
+gunicorn.conf.py) and ``/metrics`` aggregates every worker.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+REQUEST_SECONDS = Histogram(
+    "embedding_request_seconds", "Request latency by endpoint", ["endpoint", "method", "status"]
+)
+# Stages: json_decode, tokenize, forward, serialize, vector_store_lookup, vector_store_write
+STAGE_SECONDS = Histogram(
+    "embedding_stage_seconds", "Time spent in each processing stage", ["stage"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+MICRO_BATCH_SIZE = Histogram(
+    "embedding_micro_batch_size", "Texts per coalesced micro-batch", buckets=BATCH_BUCKETS
+)
+ENCODE_BATCH_SIZE = Histogram(
+    "embedding_encode_batch_size", "Texts per model forward pass", buckets=BATCH_BUCKETS
+)
+QUEUE_DEPTH = Gauge(
+    "embedding_queue_depth", "Items waiting in a queue", ["queue"], multiprocess_mode="livesum"
+)
+CACHE_LOOKUPS = Counter(
+    "embedding_cache_lookups_total", "Embedding cache lookups by result", ["result"]
+)
+SKIPPED_SECTIONS = Counter(
+    "embedding_skipped_sections_total", "Sections not re-embedded because their content is unchanged"
+)
+
+
+@contextmanager
+def timed(stage):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - started)
+
+
+def render():
+    """The metrics exposition and its content type."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,96 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import metrics
+
+
+class MicroBatcher:
+    """Coalesces encode calls from concurrent requests into shared model batches.
+
+    Callers block in ``encode`` while a single background thread drains the
+    queue. The thread waits up to ``window_ms`` after the first pending call
+    (or until ``max_batch_size`` texts are queued), runs ``encode_fn`` once over
+    everything it collected and hands each caller back its own slice. It stops
+    waiting as soon as every caller inside ``encode`` is in the batch, so a
+    lone request is not held for the window.
+    """
+
+    def __init__(self, encode_fn, window_ms=10.0, max_batch_size=64):
+        self._encode_fn = encode_fn
+        self._window = max(window_ms, 0.0) / 1000.0
+        self._max_batch_size = max(max_batch_size, 1)
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._callers = 0
+        self._callers_lock = threading.Lock()
+
+    def encode(self, texts):
+        texts = list(texts)
+        if not texts:
+            return []
+
+        future = Future()
+        self._ensure_worker()
+        with self._callers_lock:
+            self._callers += 1
+        try:
+            self._queue.put((texts, future))
+            metrics.QUEUE_DEPTH.labels("micro_batcher").set(self._queue.qsize())
+            return future.result()
+        finally:
+            with self._callers_lock:
+                self._callers -= 1
+
+    def _ensure_worker(self):
+        # Started lazily so the thread is created in the process that serves
+        # requests, not in a parent that forks workers afterwards.
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+                self._worker.start()
+
+    def _collect(self):
+        first = self._queue.get()
+        batch = [first]
+        pending = len(first[0])
+        deadline = time.monotonic() + self._window
+
+        while pending < self._max_batch_size:
+            with self._callers_lock:
+                if len(batch) >= self._callers:
+                    # Nobody else is waiting to encode
+                    break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            pending += len(item[0])
+
+        metrics.QUEUE_DEPTH.labels("micro_batcher").set(self._queue.qsize())
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [text for item_texts, _ in batch for text in item_texts]
+
+            try:
+                vectors = self._encode_fn(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for item_texts, future in batch:
+                future.set_result(vectors[offset:offset + len(item_texts)])
+                offset += len(item_texts)
@@ -0,0 +1,149 @@
+"""Inference backends for the embedding model.
+
+``torch`` is the plain SentenceTransformer. ``onnx`` runs the same model
+exported to ONNX under ONNX Runtime, and ``onnx-int8`` a dynamically
+int8-quantized copy of that export. Exports are written to ``export_dir`` once
+and reused on later starts.
+
+Run this module to measure how far a backend drifts from torch:
+
+    python model_backend.py --backend onnx-int8 --texts sample.txt
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import time
+
+import numpy as np
+
+# torch and sentence_transformers are imported when a model is loaded, so
+# importing this module (and the API) stays fast.
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+SAMPLE_TEXTS = [
+    "Senior backend engineer with Python, FastAPI and PostgreSQL experience.",
+    "Responsibilities include building data pipelines and mentoring junior developers.",
+    "Bachelor's degree in Computer Science or equivalent practical experience.",
+    "Led a team of five to migrate a monolith to Kubernetes-based microservices.",
+    "Familiar with React, TypeScript and modern front-end tooling.",
+    "Certified AWS Solutions Architect with a background in cost optimisation.",
+    "Registered nurse with ICU experience seeking a night-shift position.",
+    "Warehouse associate: forklift operation, inventory counts, shipping and receiving.",
+]
+
+
+def set_num_threads(num_threads):
+    """Cap torch's intra-op threads (0 keeps torch's default)."""
+    if num_threads:
+        import torch
+
+        torch.set_num_threads(num_threads)
+
+
+def load_model(model_name, backend="torch", device="cpu", num_threads=0, export_dir=None,
+               quantization_config="avx2"):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}', expected one of {', '.join(BACKENDS)}")
+    from sentence_transformers import SentenceTransformer
+
+    set_num_threads(num_threads)
+    if backend == "torch":
+        return SentenceTransformer(model_name, device=device)
+
+    model_kwargs = _onnx_model_kwargs(device, num_threads)
+    path = _onnx_export(model_name, export_dir, device, model_kwargs)
+    if backend == "onnx":
+        return SentenceTransformer(path, device=device, backend="onnx", model_kwargs=model_kwargs)
+
+    file_suffix = f"int8_{quantization_config}"
+    file_name = f"onnx/model_{file_suffix}.onnx"
+    if not os.path.exists(os.path.join(path, file_name)):
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+
+        logging.info(f"Quantizing the ONNX export of {model_name} to int8 ({quantization_config})")
+        model = SentenceTransformer(path, device=device, backend="onnx", model_kwargs=model_kwargs)
+        export_dynamic_quantized_onnx_model(model, quantization_config, path, file_suffix=file_suffix)
+    return SentenceTransformer(path, device=device, backend="onnx",
+                               model_kwargs={**model_kwargs, "file_name": file_name})
+
+
+def _onnx_model_kwargs(device, num_threads):
+    import onnxruntime
+
+    options = onnxruntime.SessionOptions()
+    if num_threads:
+        options.intra_op_num_threads = num_threads
+    provider = "CUDAExecutionProvider" if device == "cuda" else "CPUExecutionProvider"
+    return {"provider": provider, "session_options": options}
+
+
+def _onnx_export(model_name, export_dir, device, model_kwargs):
+    """Directory holding the ONNX export of the model, exporting it on first use."""
+    from sentence_transformers import SentenceTransformer
+
+    export_dir = export_dir or os.path.join(os.path.expanduser("~"), ".cache", "embedding-onnx")
+    path = os.path.join(export_dir, re.sub(r"[^A-Za-z0-9_.-]", "_", model_name))
+    if not os.path.exists(os.path.join(path, "onnx", "model.onnx")):
+        logging.info(f"Exporting {model_name} to ONNX in {path}")
+        model = SentenceTransformer(model_name, device=device, backend="onnx", model_kwargs=model_kwargs)
+        model.save_pretrained(path)
+    return path
+
+
+def parity_check(baseline, candidate, texts, batch_size=16):
+    """Cosine similarity between two models' embeddings of the same texts.
+
+    Returns the mean and worst-case cosine against the baseline, the largest
+    drift (1 - cosine) and both models' encode times in seconds.
+    """
+    started = time.perf_counter()
+    expected = baseline.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+    baseline_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    actual = candidate.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+    candidate_seconds = time.perf_counter() - started
+
+    expected = expected / np.linalg.norm(expected, axis=1, keepdims=True)
+    actual = actual / np.linalg.norm(actual, axis=1, keepdims=True)
+    cosine = np.sum(expected * actual, axis=1)
+    return {
+        "texts": len(texts),
+        "mean_cosine": float(cosine.mean()),
+        "min_cosine": float(cosine.min()),
+        "max_drift": float(1.0 - cosine.min()),
+        "baseline_seconds": round(baseline_seconds, 4),
+        "candidate_seconds": round(candidate_seconds, 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare an embedding backend against the torch baseline.")
+    parser.add_argument("--model", default=os.environ.get("EMBEDDING_MODEL", "all-mpnet-base-v2"))
+    parser.add_argument("--backend", default=os.environ.get("EMBEDDING_BACKEND", "onnx"), choices=BACKENDS)
+    parser.add_argument("--texts", help="File with one text per line (built-in samples when omitted)")
+    parser.add_argument("--threads", type=int, default=int(os.environ.get("EMBEDDING_NUM_THREADS") or 0))
+    parser.add_argument("--export-dir", default=os.environ.get("ONNX_EXPORT_DIR") or None)
+    parser.add_argument("--quantization-config", default=os.environ.get("ONNX_QUANTIZATION_CONFIG", "avx2"))
+    parser.add_argument("--min-cosine", type=float, default=0.99,
+                        help="Exit with status 1 when any text scores below this cosine")
+    args = parser.parse_args()
+
+    texts = SAMPLE_TEXTS
+    if args.texts:
+        with open(args.texts) as f:
+            texts = [line.strip() for line in f if line.strip()]
+
+    baseline = load_model(args.model, "torch", num_threads=args.threads)
+    candidate = load_model(args.model, args.backend, num_threads=args.threads, export_dir=args.export_dir,
+                           quantization_config=args.quantization_config)
+    report = parity_check(baseline, candidate, texts)
+    report["backend"] = args.backend
+    print(json.dumps(report, indent=2))
+    raise SystemExit(0 if report["min_cosine"] >= args.min_cosine else 1)
+
+
+if __name__ == "__main__":
+    main()
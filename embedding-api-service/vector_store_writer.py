@@ -0,0 +1,211 @@
+import logging
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from vector_codec import BASE64_FLOAT32, VECTOR_ENCODING_HEADER, decode_vectors, encode_vectors
+
+
+# Point ids are UUIDv5 of "<entity type>:<entity id>:<section>", so embedding
+# an entity again overwrites its points instead of adding duplicates. Keep in
+# sync with point_id() in the vector store.
+POINT_ID_NAMESPACE = uuid.UUID("5b6c0d1e-8f3a-4e27-9c41-7a2d9e0b3f68")
+
+
+def point_id(entity_type, entity_id, section):
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{entity_type}:{entity_id}:{section}"))
+
+
+def entity_id(entity_type, metadata):
+    """The id of the job/resume described by ``metadata``, or None."""
+    for key in (f"{entity_type}_id", f"{entity_type}Id", "id"):
+        if metadata.get(key) is not None:
+            return str(metadata[key])
+    return None
+
+
+# Queued by close() after the last write; the worker flushes and exits on it
+_CLOSE = object()
+
+
+class _PendingWrite:
+    def __init__(self, entity_type, entity_id, ids, vectors, payloads):
+        self.entity_type = entity_type
+        self.entity_id = entity_id
+        self.ids = ids
+        self.vectors = vectors
+        self.payloads = payloads
+        self.future = Future()
+
+
+class VectorStoreWriter:
+    """Write-behind buffer for points headed to the vector store.
+
+    ``submit`` enqueues the points of one entity and returns a future right
+    away. A background thread groups pending writes per entity type and sends
+    them as one ``/{entity_type}/add`` call once ``flush_size`` points are
+    buffered or the oldest write has waited ``flush_interval_ms``. Failed
+    flushes are retried with exponential backoff before the futures fail.
+    The queue is bounded, so callers block (and eventually get ``queue.Full``)
+    when the vector store falls behind. Vectors are sent in ``wire_encoding``
+    (see ``vector_codec``) rather than as JSON float lists. ``close`` flushes
+    what is still buffered before the process exits.
+    """
+
+    def __init__(self, base_url, flush_size=256, flush_interval_ms=50, max_queue=1024,
+                 max_retries=3, retry_backoff=0.5, pool_size=4, timeout=30, enqueue_timeout=5,
+                 wire_encoding=BASE64_FLOAT32):
+        self.base_url = base_url.rstrip("/")
+        self.wire_encoding = wire_encoding
+        self.flush_size = max(flush_size, 1)
+        self.flush_interval = max(flush_interval_ms, 0) / 1000.0
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.timeout = timeout
+        self.enqueue_timeout = enqueue_timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._closed = False
+
+    def submit(self, entity_type, entity_id, ids, vectors, payloads):
+        write = _PendingWrite(entity_type, entity_id, ids, vectors, payloads)
+        if not ids:
+            write.future.set_result(0)
+            return write.future
+
+        # Under the lock, so no write lands in the queue behind close()'s marker
+        with self._worker_lock:
+            if self._closed:
+                raise RuntimeError("VectorStoreWriter is closed")
+            self._ensure_worker()
+            self._queue.put(write, timeout=self.enqueue_timeout)
+        metrics.QUEUE_DEPTH.labels("vector_store_writer").set(self._queue.qsize())
+        return write.future
+
+    def close(self, timeout=None):
+        """Stop taking writes, flush everything queued or buffered and wait for the worker.
+
+        Safe to call more than once; later ``submit`` calls raise RuntimeError.
+        """
+        with self._worker_lock:
+            if self._closed:
+                return
+            self._closed = True
+            worker = self._worker
+            if worker is None or not worker.is_alive():
+                return
+            self._queue.put(_CLOSE)
+        worker.join(timeout)
+        if worker.is_alive():
+            logging.error(f"Vector store writer still flushing after {timeout}s, {self._queue.qsize()} writes queued")
+
+    def fetch_points(self, entity_type, ids, timeout=None):
+        """Return ``{point id: {"content_hash", "vector"}}`` for the points that exist."""
+        with metrics.timed("vector_store_lookup"):
+            response = self.session.post(
+                f"{self.base_url}/{entity_type}/points",
+                json={"ids": ids, "with_vectors": True},
+                headers={VECTOR_ENCODING_HEADER: self.wire_encoding},
+                timeout=timeout or self.timeout
+            )
+        response.raise_for_status()
+        return {
+            point["id"]: {"content_hash": point.get("content_hash"), "vector": decode_vectors(point["vector"])}
+            for point in response.json()["points"]
+        }
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def _ensure_worker(self):
+        # Called with _worker_lock held
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="vector-store-writer", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        pending = {}  # entity_type -> (first enqueue time, [writes])
+        while True:
+            timeout = None
+            if pending:
+                oldest = min(started for started, _ in pending.values())
+                timeout = max(oldest + self.flush_interval - time.monotonic(), 0)
+
+            try:
+                write = self._queue.get(timeout=timeout)
+                metrics.QUEUE_DEPTH.labels("vector_store_writer").set(self._queue.qsize())
+                if write is _CLOSE:
+                    for entity_type, (_, writes) in pending.items():
+                        self._flush(entity_type, writes)
+                    return
+                started, writes = pending.setdefault(write.entity_type, (time.monotonic(), []))
+                writes.append(write)
+            except queue.Empty:
+                pass
+
+            now = time.monotonic()
+            for entity_type, (started, writes) in list(pending.items()):
+                points = sum(len(w.ids) for w in writes)
+                if points >= self.flush_size or now - started >= self.flush_interval:
+                    del pending[entity_type]
+                    self._flush(entity_type, writes)
+
+    def _flush(self, entity_type, writes):
+        try:
+            self.post(
+                entity_type,
+                [w.entity_id for w in writes],
+                [point_id for w in writes for point_id in w.ids],
+                [v for w in writes for v in w.vectors],
+                [payload for w in writes for payload in w.payloads]
+            )
+        except Exception as e:
+            for w in writes:
+                w.future.set_exception(e)
+            return
+        for w in writes:
+            w.future.set_result(len(w.ids))
+
+    def post(self, entity_type, entity_ids, ids, vectors, payloads):
+        """Send points to ``/{entity_type}/add`` right away, retrying with backoff.
+
+        Safe to call from several threads; raises once the retries are spent.
+        """
+        body = {
+            f"{entity_type}_id": ",".join(str(entity_id) for entity_id in entity_ids),
+            "ids": ids,
+            "vectors": encode_vectors(np.stack(vectors), self.wire_encoding),
+            "payloads": payloads,
+        }
+        url = f"{self.base_url}/{entity_type}/add"
+
+        error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self.retry_backoff * 2 ** (attempt - 1))
+            try:
+                with metrics.timed("vector_store_write"):
+                    response = self.session.post(url, json=body, timeout=self.timeout)
+                if response.status_code == 200:
+                    return len(ids)
+                error = RuntimeError(f"Vector store returned {response.status_code}: {response.text}")
+            except requests.exceptions.RequestException as e:
+                error = e
+            logging.warning(f"Flushing {len(ids)} {entity_type} points failed (attempt {attempt + 1}): {error}")
+
+        logging.error(f"Giving up on {len(ids)} {entity_type} points for {body[f'{entity_type}_id']}: {error}")
+        raise error
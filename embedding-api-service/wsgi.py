@@ -1,4 +1,5 @@
-from embedding_api import app
+from embedding_api import app, start
 
 if __name__ == "__main__":
+    start()
     app.run(port= 5500)
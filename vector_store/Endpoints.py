@@ -1,22 +1,47 @@
 import logging
 import traceback
-from typing import Any, Dict, List
-from fastapi import APIRouter, HTTPException, FastAPI
+from typing import Any, Dict, List, Optional, Union
+from fastapi import APIRouter, Header, HTTPException, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from vector_codec import decode_vectors, encode_vectors, negotiate
+import config
+import metrics
+from profiler import SamplingProfiler
 from vector_logic import (
-    add_resume, update_resume, delete_resume, search_resumes, create_resume_collection,
-    add_job, update_job, delete_job, search_jobs, create_job_collection,weighted_search,task_based_search,fuzzy_search
+    add_resume, update_resume, delete_resume, delete_resumes, search_resumes, create_resume_collection,
+    add_job, update_job, delete_job, delete_jobs, search_jobs, get_points, create_job_collection,weighted_search,task_based_search,fuzzy_search,
+    create_payload_indexes, requantize_collection, rebuild_collection, prepare_collection, swap_alias,
+    search_resumes_batch, search_jobs_batch, weighted_search_batch, match_resumes, match_jobs,
+    rerank_resumes, rerank_jobs, reranker, search_cache, readiness, warmup
 )
 
+# Vectors may be sent as JSON number arrays or in the compact base64 form
+# described in vector_codec.py
+class EncodedVectors(BaseModel):
+    encoding: str = "base64"
+    dtype: str = "float32"  # float32 or float16
+    shape: List[int]
+    data: str  # Base64 of the little-endian vector bytes
+
+# Per-query search options shared by every search request
+class SearchOptions(BaseModel):
+    hnsw_ef: Optional[int] = None  # Per-query HNSW search breadth (higher = better recall, slower)
+    exact: bool = False  # Skip the HNSW index and score every matching point
+    rescore: Optional[bool] = None  # On quantized collections, re-rank candidates with the original vectors
+    oversampling: Optional[float] = None  # On quantized collections, fetch oversampling * top_k candidates to rescore
+
+    def search_options(self) -> dict:
+        return {"hnsw_ef": self.hnsw_ef, "exact": self.exact, "rescore": self.rescore, "oversampling": self.oversampling}
+
 class JobData(BaseModel):
     job_id: str
-    ids: List[str]
-    vectors: List[List[float]]
+    ids: Optional[List[str]] = None  # Point ids; derived from job_id and section when omitted
+    vectors: Union[EncodedVectors, List[List[float]]]
     payloads: List[Dict[str, Any]]# Metadata about the job (e.g., title, company, location, etc.)
 
-class JobSearchRequest(BaseModel):
-    query_embedding: list  # The embedding for the search query
+class JobSearchRequest(SearchOptions):
+    query_embedding: Union[EncodedVectors, List[float]]  # The embedding for the search query
     section: str  # Section to search (e.g., skills, responsibilities, etc.)
     top_k: int = 10  # Number of results to return
 
@@ -25,55 +50,265 @@ router = APIRouter()
 # Data models for requests
 class ResumeData(BaseModel):
     resume_id: str
-    ids: List[str]
-    vectors: List[List[float]]
+    ids: Optional[List[str]] = None  # Point ids; derived from resume_id and section when omitted
+    vectors: Union[EncodedVectors, List[List[float]]]
     payloads: List[Dict[str, Any]]
 
-class SearchRequest(BaseModel):
-    query_embedding: list  # The embedding for the search query
+class SearchRequest(SearchOptions):
+    query_embedding: Union[EncodedVectors, List[float]]  # The embedding for the search query
     section: str  # Section to search (skills, experience, etc.)
     top_k: int = 10  # Number of results to return
+    metadata_filters: Optional[Dict[str, Any]] = None  # Exact-match payload filters (e.g., {"location": "Berlin"})
+
+class BatchSearchQuery(SearchOptions):
+    query_embedding: Union[EncodedVectors, List[float]]  # The embedding for this query
+    section: Optional[str] = None  # Section to search, all sections when omitted
+    top_k: Optional[int] = None  # Number of results to return (endpoint default when omitted)
+    threshold: Optional[float] = None  # Minimum score (endpoint default when omitted)
+    metadata_filters: Optional[Dict[str, Any]] = None  # Exact-match payload filters (e.g., {"location": "Berlin"})
 
-class RerankRequest(BaseModel):
-    job_description: str  # The job description to rerank against
-    resume_results: list  # List of resume search results from the search endpoint
+class BatchSearchRequest(BaseModel):
+    queries: List[BatchSearchQuery]  # Run together as a single Qdrant batch search
+
+class MatchQuery(BaseModel):
+    section: str  # Section to search (skills, experience, etc.)
+    query_embedding: Union[EncodedVectors, List[float]]  # The embedding to search that section with
+    weight: float = 1.0  # Weight of this section in the fused score
+    threshold: Optional[float] = None  # Minimum score for a hit in this section
+
+class MatchRequest(SearchOptions):
+    queries: List[MatchQuery]  # One query per section, searched together
+    fusion: str = "weighted"  # "weighted" (weighted mean of section scores) or "rrf" (reciprocal-rank fusion)
+    top_k: int = 10  # Number of resumes/jobs to return
+    candidates_per_section: int = 50  # Hits fetched per section before fusing
+    rrf_k: int = 60  # Rank offset used by "rrf"
+    metadata_filters: Optional[Dict[str, Any]] = None  # Exact-match payload filters applied to every section
+
+class QuantizationRequest(BaseModel):
+    collection_name: str  # ResumeCollection or JobCollection
+    mode: str  # "none", "scalar" (int8) or "binary"
+
+class RerankRequest(SearchOptions):
+    query_text: str  # Text the candidates are scored against (e.g. the job description for /resume/rerank)
+    query_embedding: Union[EncodedVectors, List[float]]  # The embedding for the first-stage search
+    section: Optional[str] = None  # Section to search, all sections when omitted
+    top_k: int = 10  # Number of results to return
+    candidates: int = 50  # First-stage hits to rerank (capped by RERANK_MAX_CANDIDATES)
+    candidate_texts: Optional[Dict[str, str]] = None  # Resume/job id (or point id) -> text; payload text otherwise
+    threshold: Optional[float] = None  # Minimum first-stage score
+    budget_ms: Optional[float] = None  # Time the cross-encoder may take (RERANK_BUDGET_MS when omitted)
+    metadata_filters: Optional[Dict[str, Any]] = None  # Exact-match payload filters (e.g., {"location": "Berlin"})
 
 class WeightedSearchRequest(BaseModel):
     job_embedding: dict  # Embeddings for the job sections (skills, experience, etc.)
-    resume_embeddings: dict  # Resume embeddings (skills, experience, etc.)
+    resume_embeddings: Optional[dict] = None  # Resume embeddings (skills, experience, etc.) for a single pair
+    candidate_embeddings: Optional[dict] = None  # Section -> (M, dim) matrix of M candidate resumes
+    candidate_ids: Optional[List[str]] = None  # Resume ids, one per candidate row
     weights: dict  # Weighting for each section (e.g., {"skills": 0.7, "experience": 0.3})
+    top_k: Optional[int] = None  # Number of candidates to return, all when omitted
+    normalized: bool = False  # Set when the vectors are already unit length
 
 class TaskBasedSearchRequest(BaseModel):
     job_tasks: dict  # Task embeddings (e.g., {"leadership": [0.44, 0.55, 0.66]})
     resume_embeddings: dict  # Embeddings of the resume sections (e.g., {"experience": [0.22, 0.85, 0.47]})
 
-class FuzzySearchRequest(BaseModel):
-    query_embedding: list  # The embedding for the search query
+class FuzzySearchRequest(SearchOptions):
+    query_embedding: Union[EncodedVectors, List[float]]  # The embedding for the search query
     collection_name: str  # The collection to search in
     top_k: int = 10  # Number of results to return
     threshold: float = 0.8  # Similarity threshold for filtering results
 
 
+class PointsRequest(BaseModel):
+    ids: List[str]  # Point ids to look up; missing points are left out of the response
+    with_vectors: bool = False  # Also return the stored vectors
+
+class BulkDeleteRequest(BaseModel):
+    ids: List[str]  # Resume or job ids whose points are deleted
+
+class RebuildRequest(BaseModel):
+    collection_name: str  # Alias to rebuild: "ResumeCollection" or "JobCollection"
+    copy_points: bool = True  # Copy existing points into the new version (false starts it empty)
+    drop_old: bool = True  # Delete the previous version once the alias points at the new one
+
+class SwapRequest(BaseModel):
+    collection_name: str  # Alias to repoint
+    target: str  # Versioned collection returned by /collection/prepare
+    drop_old: bool = True
+
+
+def _decode(vectors):
+    with metrics.timed("vector_decode"):
+        return decode_vectors(vectors)
+
+
+async def _points_response(collection_name: str, points_request: PointsRequest, encoding: str) -> dict:
+    records = await get_points(collection_name, points_request.ids, with_vectors=points_request.with_vectors)
+    points = []
+    for record in records:
+        point = {"id": str(record.id), "content_hash": (record.payload or {}).get("content_hash")}
+        if points_request.with_vectors:
+            point["vector"] = encode_vectors(record.vector, encoding)
+        points.append(point)
+    return {"points": points}
+
+
+def _decode_sections(embeddings: dict) -> dict:
+    return {section: _decode(vector) for section, vector in embeddings.items()}
+
+
+def _match_options(match_request: MatchRequest) -> dict:
+    queries = [
+        {**query.dict(exclude={"query_embedding"}), "query_embedding": _decode(query.query_embedding)}
+        for query in match_request.queries
+    ]
+    options = match_request.dict(exclude={"queries"})
+    return {"queries": queries, **options}
+
+
+def _rerank_options(rerank_request: RerankRequest) -> dict:
+    options = rerank_request.dict(exclude={"query_embedding"})
+    return {**options, "query_embedding": _decode(rerank_request.query_embedding)}
+
+
+def _batch_queries(batch_request: BatchSearchRequest) -> List[dict]:
+    return [
+        {**query.dict(exclude={"query_embedding"}), "query_embedding": _decode(query.query_embedding)}
+        for query in batch_request.queries
+    ]
+
+
+# Liveness probe: the process is up and serving
+@router.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+# Readiness probe: Qdrant answered and the collections are warmed
+@router.get("/readyz")
+async def readyz():
+    if not readiness["ready"]:
+        try:
+            await warmup()
+        except Exception as e:
+            raise HTTPException(status_code=503, detail=f"Qdrant is not ready: {e}")
+    return readiness
+
+
+# Prometheus metrics
+@router.get("/metrics")
+async def metrics_endpoint():
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+
+# Runtime sampling profiler, off unless PROFILER_ENABLED is set
+profiler = SamplingProfiler()
+
+
+@router.post("/debug/profiler/start")
+async def start_profiler_endpoint(interval_ms: float = 5.0, max_seconds: float = 300.0):
+    if not config.PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler is disabled, set PROFILER_ENABLED")
+    if not profiler.start(interval_ms / 1000.0, max_seconds):
+        raise HTTPException(status_code=409, detail="Profiler is already running")
+    return profiler.status()
+
+
+@router.post("/debug/profiler/stop")
+async def stop_profiler_endpoint():
+    if not config.PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler is disabled, set PROFILER_ENABLED")
+    return Response(content=profiler.stop(), media_type="text/plain")
+
+
+# Endpoint for search result cache counters
+@router.get("/search/stats")
+async def search_stats_endpoint():
+    return search_cache.stats()
 
 
 # Endpoint to initialize collection
 @router.post("/collection/create")
 async def initialize_collection():
     try:
-        create_resume_collection()
+        await create_resume_collection()
         return {"message": "ResumeCollection created successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Endpoint to (re)create payload indexes on existing collections
+@router.post("/collection/indexes")
+async def create_indexes_endpoint():
+    try:
+        for collection_name in ("ResumeCollection", "JobCollection"):
+            await create_payload_indexes(collection_name)
+        return {"message": "Payload indexes created successfully"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Endpoint to re-quantize an existing collection without re-embedding
+@router.post("/collection/quantization")
+async def quantization_endpoint(quantization_request: QuantizationRequest):
+    try:
+        await requantize_collection(quantization_request.collection_name, quantization_request.mode)
+        return {"message": f"{quantization_request.collection_name} quantization set to {quantization_request.mode}"}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Endpoint to rebuild a collection behind its alias without downtime
+@router.post("/collection/rebuild")
+async def rebuild_collection_endpoint(rebuild_request: RebuildRequest):
+    try:
+        return await rebuild_collection(
+            rebuild_request.collection_name,
+            copy_points=rebuild_request.copy_points,
+            drop_old=rebuild_request.drop_old
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Endpoint to create an empty new version of a collection for re-ingestion.
+# Writes to the alias are mirrored into it until /collection/swap.
+@router.post("/collection/prepare")
+async def prepare_collection_endpoint(rebuild_request: RebuildRequest):
+    try:
+        target = await prepare_collection(rebuild_request.collection_name)
+        return {"alias": rebuild_request.collection_name, "collection_name": target}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Endpoint to atomically point an alias at a prepared collection
+@router.post("/collection/swap")
+async def swap_collection_endpoint(swap_request: SwapRequest):
+    try:
+        previous = await swap_alias(swap_request.collection_name, swap_request.target, drop_old=swap_request.drop_old)
+        return {"alias": swap_request.collection_name, "collection_name": swap_request.target, "previous": previous}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # Endpoint to add a resume
 @router.post("/resume/add")
 async def add_resume_endpoint(resume_data: ResumeData):
     try:
-        add_resume(
+        await add_resume(
             resume_id=resume_data.resume_id,
             ids=resume_data.ids,
-            vectors=resume_data.vectors,
+            vectors=_decode(resume_data.vectors),
             payloads=resume_data.payloads
         )
         return {"message": f"Resume {resume_data.resume_id} added successfully"}
@@ -83,9 +318,9 @@ async def add_resume_endpoint(resume_data: ResumeData):
 
 # Endpoint to update a resume section
 @router.put("/resume/update/{resume_id}/{section}")
-async def update_resume_endpoint(resume_id: str, section: str, new_vector: list):
+async def update_resume_endpoint(resume_id: str, section: str, new_vector: Union[EncodedVectors, List[float]]):
     try:
-        update_resume(resume_id, section, new_vector)
+        await update_resume(resume_id, section, _decode(new_vector))
         return {"message": f"Resume {resume_id} section {section} updated successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -95,39 +330,109 @@ async def update_resume_endpoint(resume_id: str, section: str, new_vector: list)
 @router.delete("/resume/delete/{resume_id}")
 async def delete_resume_endpoint(resume_id: str):
     try:
-        delete_resume(resume_id)
+        await delete_resume(resume_id)
         return {"message": f"Resume {resume_id} deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Endpoint to look up resume points and their section fingerprints
+@router.post("/resume/points")
+async def resume_points_endpoint(points_request: PointsRequest, x_vector_encoding: Optional[str] = Header(None)):
+    try:
+        return await _points_response("ResumeCollection", points_request, negotiate(x_vector_encoding))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Endpoint to delete many resumes at once
+@router.post("/resume/delete_batch")
+async def delete_resumes_endpoint(delete_request: BulkDeleteRequest):
+    try:
+        await delete_resumes(delete_request.ids)
+        return {"message": f"{len(delete_request.ids)} resumes deleted successfully"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # Endpoint to search resumes
 @router.post("/resume/search")
 async def search_resume_endpoint(search_request: SearchRequest):
     try:
-        results = search_resumes(search_request.query_embedding, search_request.section, search_request.top_k)
+        results = await search_resumes(
+            _decode(search_request.query_embedding),
+            search_request.section,
+            search_request.top_k,
+            metadata_filters=search_request.metadata_filters,
+            **search_request.search_options()
+        )
         return {"results": results}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-# Endpoint for reranking search results using BERT/T5
-# @router.post("/resume/rerank")
-# async def rerank_results_endpoint(rerank_request: RerankRequest):
-#     try:
-#         reranked = rerank_results(rerank_request.job_description, rerank_request.resume_results)
-#         return {"reranked_results": reranked}
-#     except Exception as e:
-#         raise HTTPException(status_code=500, detail=str(e))
+# Endpoint to search resumes with several query vectors at once
+@router.post("/resume/search_batch")
+async def search_resume_batch_endpoint(batch_request: BatchSearchRequest):
+    try:
+        results = await search_resumes_batch(_batch_queries(batch_request))
+        return {"results": results}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Endpoint to rank whole resumes from several section searches
+@router.post("/resume/match")
+async def match_resume_endpoint(match_request: MatchRequest):
+    try:
+        results = await match_resumes(**_match_options(match_request))
+        return {"results": results}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Endpoint for reranking resume search results with a cross-encoder
+@router.post("/resume/rerank")
+async def rerank_resume_endpoint(rerank_request: RerankRequest):
+    try:
+        return await rerank_resumes(**_rerank_options(rerank_request))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Endpoint for reranker cache and fallback counters
+@router.get("/rerank/stats")
+async def rerank_stats_endpoint():
+    return reranker.stats()
 
 
 # Endpoint for weighted search
 @router.post("/resume/weighted_search")
 async def weighted_search_endpoint(weighted_search_request: WeightedSearchRequest):
+    if weighted_search_request.candidate_embeddings is not None:
+        try:
+            ranked = weighted_search_batch(
+                _decode_sections(weighted_search_request.job_embedding),
+                _decode_sections(weighted_search_request.candidate_embeddings),
+                weighted_search_request.weights,
+                top_k=weighted_search_request.top_k,
+                candidate_ids=weighted_search_request.candidate_ids,
+                normalized=weighted_search_request.normalized
+            )
+            return {"results": ranked}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    if weighted_search_request.resume_embeddings is None:
+        raise HTTPException(status_code=400, detail="Either 'resume_embeddings' or 'candidate_embeddings' is required")
     try:
         weighted_result = weighted_search(
-            weighted_search_request.job_embedding,
-            weighted_search_request.resume_embeddings,
+            _decode_sections(weighted_search_request.job_embedding),
+            _decode_sections(weighted_search_request.resume_embeddings),
             weighted_search_request.weights
         )
         return {"weighted_score": weighted_result}
@@ -139,9 +444,9 @@ async def weighted_search_endpoint(weighted_search_request: WeightedSearchReques
 @router.post("/resume/task_based_search")
 async def task_based_search_endpoint(task_based_search_request: TaskBasedSearchRequest):
     try:
-        task_result = task_based_search(
-            task_based_search_request.job_tasks,
-            task_based_search_request.resume_embeddings
+        task_result = await task_based_search(
+            _decode_sections(task_based_search_request.job_tasks),
+            _decode_sections(task_based_search_request.resume_embeddings)
         )
         return {"task_search_results": task_result}
     except Exception as e:
@@ -152,7 +457,7 @@ async def task_based_search_endpoint(task_based_search_request: TaskBasedSearchR
 @router.post("/job/collection/create")
 async def initialize_job_collection():
     try:
-        create_job_collection()
+        await create_job_collection()
         return {"message": "JobCollection created successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -162,10 +467,10 @@ async def initialize_job_collection():
 @router.post("/job/add")
 async def add_job_endpoint(job_data: JobData):
     try:
-        add_job(
+        await add_job(
             job_id=job_data.job_id,
             ids=job_data.ids,
-            vectors=job_data.vectors,
+            vectors=_decode(job_data.vectors),
             payloads=job_data.payloads
         )
         return {"message": f"Job {job_data.job_id} added successfully"}
@@ -176,9 +481,9 @@ async def add_job_endpoint(job_data: JobData):
 
 # Endpoint to update a job section
 @router.put("/job/update/{job_id}/{section}")
-async def update_job_endpoint(job_id: str, section: str, new_vector: list):
+async def update_job_endpoint(job_id: str, section: str, new_vector: Union[EncodedVectors, List[float]]):
     try:
-        update_job(job_id, section, new_vector)
+        await update_job(job_id, section, _decode(new_vector))
         return {"message": f"Job {job_id} section {section} updated successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -188,18 +493,72 @@ async def update_job_endpoint(job_id: str, section: str, new_vector: list):
 @router.delete("/job/delete/{job_id}")
 async def delete_job_endpoint(job_id: str):
     try:
-        delete_job(job_id)
+        await delete_job(job_id)
         return {"message": f"Job {job_id} deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Endpoint to look up job points and their section fingerprints
+@router.post("/job/points")
+async def job_points_endpoint(points_request: PointsRequest, x_vector_encoding: Optional[str] = Header(None)):
+    try:
+        return await _points_response("JobCollection", points_request, negotiate(x_vector_encoding))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Endpoint to delete many jobs at once, e.g. expired postings
+@router.post("/job/delete_batch")
+async def delete_jobs_endpoint(delete_request: BulkDeleteRequest):
+    try:
+        await delete_jobs(delete_request.ids)
+        return {"message": f"{len(delete_request.ids)} jobs deleted successfully"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # Endpoint to search jobs
 @router.post("/job/search")
 async def search_job_endpoint(job_search_request: JobSearchRequest):
     try:
-        results = search_jobs(job_search_request.query_embedding, job_search_request.section, job_search_request.top_k)
+        results = await search_jobs(
+            _decode(job_search_request.query_embedding),
+            job_search_request.section,
+            job_search_request.top_k,
+            **job_search_request.search_options()
+        )
+        return {"results": results}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Endpoint to search jobs with several query vectors at once
+@router.post("/job/search_batch")
+async def search_job_batch_endpoint(batch_request: BatchSearchRequest):
+    try:
+        results = await search_jobs_batch(_batch_queries(batch_request))
+        return {"results": results}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Endpoint to rank whole jobs from several section searches
+@router.post("/job/match")
+async def match_job_endpoint(match_request: MatchRequest):
+    try:
+        results = await match_jobs(**_match_options(match_request))
         return {"results": results}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Endpoint for reranking job search results with a cross-encoder
+@router.post("/job/rerank")
+async def rerank_job_endpoint(rerank_request: RerankRequest):
+    try:
+        return await rerank_jobs(**_rerank_options(rerank_request))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -207,11 +566,12 @@ async def search_job_endpoint(job_search_request: JobSearchRequest):
 @router.post("/fuzzy_search")
 async def fuzzy_search_endpoint(fuzzy_search_request: FuzzySearchRequest):
     try:
-        results = fuzzy_search(
-            fuzzy_search_request.query_embedding,
+        results = await fuzzy_search(
+            _decode(fuzzy_search_request.query_embedding),
             fuzzy_search_request.collection_name,
             fuzzy_search_request.top_k,
-            fuzzy_search_request.threshold
+            fuzzy_search_request.threshold,
+            **fuzzy_search_request.search_options()
         )
         return {"results": results}
     except Exception as e:
@@ -0,0 +1,103 @@
+import os
+
+
+def _env_number(name, default, cast=int):
+    value = os.environ.get(name, "")
+    return cast(value) if value else default
+
+
+def _env_flag(name, default=False):
+    value = os.environ.get(name, "")
+    return value.lower() in ("1", "true", "yes") if value else default
+
+
+# Qdrant connection. QDRANT_URL wins over host/port when it is set.
+QDRANT_URL = os.environ.get("QDRANT_URL") or None
+QDRANT_HOST = os.environ.get("QDRANT_HOST", "qdrant")
+QDRANT_PORT = _env_number("QDRANT_PORT", 6333)
+QDRANT_GRPC_PORT = _env_number("QDRANT_GRPC_PORT", 6334)
+QDRANT_PREFER_GRPC = _env_flag("QDRANT_PREFER_GRPC")
+# Embedded Qdrant instead of a server: ":memory:" or a directory to persist
+# to. Meant for benchmarks and local runs; it scans instead of using HNSW.
+QDRANT_LOCATION = os.environ.get("QDRANT_LOCATION") or None
+
+# Maximum open (and kept-alive) HTTP connections to Qdrant
+QDRANT_POOL_SIZE = _env_number("QDRANT_POOL_SIZE", 32)
+
+# Timeouts in seconds: the client-wide ceiling, and the per-request budgets
+# applied to searches and writes
+QDRANT_CLIENT_TIMEOUT = _env_number("QDRANT_CLIENT_TIMEOUT", 30)
+QDRANT_SEARCH_TIMEOUT = _env_number("QDRANT_SEARCH_TIMEOUT", 5)
+QDRANT_WRITE_TIMEOUT = _env_number("QDRANT_WRITE_TIMEOUT", 30)
+
+# Collection bootstrap. PAYLOAD_INDEX_FIELDS lists "field:type" pairs (type is
+# keyword, integer, float, bool or datetime) indexed on top of "section".
+PAYLOAD_INDEX_FIELDS = os.environ.get(
+    "PAYLOAD_INDEX_FIELDS",
+    "resume_id:keyword,job_id:keyword,jobId:keyword,location:keyword,company:keyword"
+)
+HNSW_M = _env_number("HNSW_M", 16)
+HNSW_EF_CONSTRUCT = _env_number("HNSW_EF_CONSTRUCT", 100)
+# Keep vectors, the HNSW graph and payloads on disk instead of in RAM
+VECTORS_ON_DISK = _env_flag("VECTORS_ON_DISK")
+HNSW_ON_DISK = _env_flag("HNSW_ON_DISK")
+PAYLOAD_ON_DISK = _env_flag("PAYLOAD_ON_DISK")
+
+# Vector quantization for new collections: "none", "scalar" (int8) or
+# "binary". Original float32 vectors are then kept on disk for rescoring
+# while the quantized copy stays in RAM (QUANTIZATION_ALWAYS_RAM).
+QUANTIZATION = os.environ.get("QUANTIZATION", "none").lower()
+QUANTIZATION_ALWAYS_RAM = _env_flag("QUANTIZATION_ALWAYS_RAM", True)
+SCALAR_QUANTILE = _env_number("SCALAR_QUANTILE", 0.99, float)
+
+# Default quantized-search behaviour: rescore candidates with the original
+# vectors, fetching oversampling * limit candidates first
+SEARCH_RESCORE = _env_flag("SEARCH_RESCORE", True)
+SEARCH_OVERSAMPLING = _env_number("SEARCH_OVERSAMPLING", None, float)
+
+# Collection rebuilds copy points in batches of COPY_BATCH_SIZE with up to
+# COPY_PARALLEL upserts in flight
+COPY_BATCH_SIZE = _env_number("COPY_BATCH_SIZE", 256)
+COPY_PARALLEL = _env_number("COPY_PARALLEL", 4)
+# Seconds a replica keeps its lookup of a collection's rebuild target before
+# asking Qdrant again. prepare_collection waits this long after publishing a
+# target, so every replica mirrors writes into it before the copy starts.
+REBUILD_TARGET_TTL = _env_number("REBUILD_TARGET_TTL", 1, float)
+
+# Default hnsw_ef for searches that do not set one (Qdrant's own default when unset)
+SEARCH_HNSW_EF = _env_number("SEARCH_HNSW_EF", None)
+
+# Search results are cached for SEARCH_CACHE_TTL seconds, at most
+# SEARCH_CACHE_SIZE of them (0 turns the cache off). Writes through this
+# process invalidate a collection's entries; writes through other replicas
+# only show up once the TTL expires.
+SEARCH_CACHE_SIZE = _env_number("SEARCH_CACHE_SIZE", 10000)
+SEARCH_CACHE_TTL = _env_number("SEARCH_CACHE_TTL", 30, float)
+
+# Second-stage reranking (/resume/rerank, /job/rerank). At most
+# RERANK_MAX_CANDIDATES first-stage hits per request are scored by the
+# cross-encoder, RERANK_BATCH_SIZE pairs per forward pass. When scoring takes
+# longer than RERANK_BUDGET_MS, or RERANK_MAX_PENDING scoring jobs are already
+# queued, results keep their first-stage order. Candidate texts come from the
+# request or from the RERANK_TEXT_FIELD payload field.
+RERANK_MODEL = os.environ.get("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_MAX_CANDIDATES = _env_number("RERANK_MAX_CANDIDATES", 100)
+RERANK_BATCH_SIZE = _env_number("RERANK_BATCH_SIZE", 32)
+RERANK_BUDGET_MS = _env_number("RERANK_BUDGET_MS", 300, float)
+RERANK_MAX_PENDING = _env_number("RERANK_MAX_PENDING", 4)
+RERANK_CACHE_SIZE = _env_number("RERANK_CACHE_SIZE", 100000)
+RERANK_NUM_THREADS = _env_number("RERANK_NUM_THREADS", 0)
+RERANK_TEXT_FIELD = os.environ.get("RERANK_TEXT_FIELD", "text")
+
+# Expose /debug/profiler/start and /debug/profiler/stop, which sample the
+# service's stacks for a flame graph
+PROFILER_ENABLED = _env_flag("PROFILER_ENABLED")
+
+
+def payload_index_fields():
+    fields = {"section": "keyword"}
+    for item in PAYLOAD_INDEX_FIELDS.split(","):
+        name, _, schema = item.strip().partition(":")
+        if name:
+            fields[name] = schema.strip() or "keyword"
+    return fields
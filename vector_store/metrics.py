@@ -0,0 +1,74 @@
+"""Prometheus metrics for the vector store, served at ``/metrics``."""
+import time
+from contextlib import contextmanager
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+REQUEST_SECONDS = Histogram(
+    "vector_store_request_seconds", "Request latency by endpoint", ["endpoint", "method", "status"]
+)
+# Stages: vector_decode, qdrant_search, qdrant_search_batch, qdrant_upsert, qdrant_delete, rerank
+STAGE_SECONDS = Histogram(
+    "vector_store_stage_seconds", "Time spent in each processing stage", ["stage"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+# Kinds: search_batch (queries per Qdrant batch), upsert (points per upsert), rerank (pairs scored)
+BATCH_SIZE = Histogram(
+    "vector_store_batch_size", "Items per batched operation", ["kind"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+)
+
+
+@contextmanager
+def timed(stage):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - started)
+
+
+class CacheCollector:
+    """Reads the search and rerank cache counters at scrape time."""
+
+    def __init__(self, search_cache, reranker):
+        self.search_cache = search_cache
+        self.reranker = reranker
+
+    def collect(self):
+        search = self.search_cache.stats()
+        rerank = self.reranker.stats()
+
+        lookups = CounterMetricFamily("vector_store_cache_lookups", "Cache lookups by cache and result",
+                                      labels=["cache", "result"])
+        for result in ("hits", "misses", "coalesced"):
+            lookups.add_metric(["search", result], search[result])
+        for result in ("hits", "misses"):
+            lookups.add_metric(["rerank", result], rerank["cache"][result])
+        yield lookups
+
+        entries = GaugeMetricFamily("vector_store_cache_entries", "Entries held by each cache", labels=["cache"])
+        entries.add_metric(["search"], search["entries"])
+        entries.add_metric(["rerank"], rerank["cache"]["entries"])
+        yield entries
+
+        depth = GaugeMetricFamily("vector_store_queue_depth", "Work waiting or in flight", labels=["queue"])
+        depth.add_metric(["search_in_flight"], search["in_flight"])
+        depth.add_metric(["rerank_pending"], rerank["pending"])
+        yield depth
+
+        fallbacks = CounterMetricFamily("vector_store_rerank_fallbacks", "Reranks that fell back to first-stage scores",
+                                        labels=["reason"])
+        for reason, count in rerank["fallbacks"].items():
+            fallbacks.add_metric([reason], count)
+        yield fallbacks
+
+
+def register_caches(search_cache, reranker):
+    REGISTRY.register(CacheCollector(search_cache, reranker))
+
+
+def render():
+    """The metrics exposition and its content type."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,74 @@
+import collections
+import os
+import sys
+import threading
+import time
+
+
+class SamplingProfiler:
+    """Low-overhead sampling profiler that can be switched on at runtime.
+
+    While running, a background thread records the stack of every other
+    thread each ``interval`` seconds. ``stop`` returns the samples in the
+    collapsed "thread;frame;frame count" format read by flamegraph.pl and
+    speedscope. A run stops by itself after ``max_seconds``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._counts = collections.Counter()
+        self.samples = 0
+        self.started_at = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval=0.005, max_seconds=300.0):
+        """Start sampling; returns False when a run is already in progress."""
+        with self._lock:
+            if self.running:
+                return False
+            self._counts = collections.Counter()
+            self.samples = 0
+            self.started_at = time.monotonic()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(max(interval, 0.001), max_seconds),
+                                            name="sampling-profiler", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        """Stop sampling and return the collapsed stacks collected so far."""
+        with self._lock:
+            self._stop.set()
+            if self._thread is not None:
+                self._thread.join()
+                self._thread = None
+            return "".join(f"{stack} {count}\n" for stack, count in self._counts.most_common())
+
+    def status(self):
+        return {
+            "running": self.running,
+            "samples": self.samples,
+            "seconds": round(time.monotonic() - self.started_at, 3) if self.started_at else 0.0,
+        }
+
+    def _run(self, interval, max_seconds):
+        own = threading.get_ident()
+        deadline = time.monotonic() + max_seconds
+        while not self._stop.wait(interval) and time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self._counts[";".join(reversed(stack))] += 1
+            self.samples += 1
@@ -0,0 +1,150 @@
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class PairScoreCache:
+    """Bounded LRU of cross-encoder scores keyed by (query hash, candidate content hash)."""
+
+    def __init__(self, max_entries: int = 100000):
+        self.max_entries = max_entries
+        self._scores: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys: Sequence[Tuple[str, str]]) -> List[Optional[float]]:
+        scores = []
+        with self._lock:
+            for key in keys:
+                score = self._scores.get(key)
+                if score is None:
+                    self.misses += 1
+                else:
+                    self._scores.move_to_end(key)
+                    self.hits += 1
+                scores.append(score)
+        return scores
+
+    def put_many(self, items):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            for key, score in items:
+                self._scores[key] = score
+                self._scores.move_to_end(key)
+            while len(self._scores) > self.max_entries:
+                self._scores.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._scores),
+        }
+
+
+class CrossEncoderReranker:
+    """Score (query, candidate) text pairs with a cross-encoder on the CPU.
+
+    The model is loaded on first use. All scoring runs on one worker thread,
+    so concurrent requests queue up instead of oversubscribing the CPU, and
+    each request's pairs go through the model in batches of ``batch_size``.
+    ``score`` stops waiting after ``budget`` seconds, and does not queue at
+    all while ``max_pending`` scoring jobs are already waiting; the caller
+    then keeps the first-stage ranking. Scores that finish after the caller
+    gave up still land in the cache for the next request.
+    """
+
+    def __init__(self, model_name: str, batch_size: int = 32, max_pending: int = 4, cache_size: int = 100000,
+                 num_threads: int = 0):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.num_threads = num_threads
+        self.cache = PairScoreCache(cache_size)
+        self._model = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self.fallbacks = {}
+
+    def _load(self):
+        # Only ever called from the single scoring thread
+        if self._model is None:
+            from sentence_transformers import CrossEncoder
+
+            if self.num_threads:
+                import torch
+
+                torch.set_num_threads(self.num_threads)
+            self._model = CrossEncoder(self.model_name, device="cpu")
+        return self._model
+
+    def _predict(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        scores = self._load().predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+        return [float(score) for score in scores]
+
+    def _finished(self, future, keys):
+        with self._pending_lock:
+            self._pending -= 1
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put_many(zip(keys, future.result()))
+
+    async def score(self, query_text: str, candidates: Sequence[Tuple[str, str]],
+                    budget: float = None) -> Tuple[List[Optional[float]], Optional[str]]:
+        """Score ``candidates`` ((content hash, text) pairs) against ``query_text``.
+
+        Returns one score per candidate and, when the cross-encoder could not
+        score all of them, why: "overloaded", "budget" or "error". Scores
+        that were cached are returned either way.
+        """
+        query_key = text_hash(f"{self.model_name}\0{query_text}")
+        keys = [(query_key, content_hash) for content_hash, _ in candidates]
+        scores = self.cache.get_many(keys)
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if not missing:
+            return scores, None
+
+        with self._pending_lock:
+            if self._pending >= self.max_pending:
+                return scores, self._fallback("overloaded")
+            self._pending += 1
+        missing_keys = [keys[i] for i in missing]
+        future = self._executor.submit(self._predict, [(query_text, candidates[i][1]) for i in missing])
+        future.add_done_callback(lambda f: self._finished(f, missing_keys))
+        try:
+            # A job still queued when the budget runs out is cancelled with the wait
+            new_scores = await asyncio.wait_for(asyncio.wrap_future(future), timeout=budget or None)
+        except asyncio.TimeoutError:
+            return scores, self._fallback("budget")
+        except Exception:
+            logging.exception("Cross-encoder scoring failed")
+            return scores, self._fallback("error")
+
+        for i, score in zip(missing, new_scores):
+            scores[i] = score
+        return scores, None
+
+    def _fallback(self, reason: str) -> str:
+        self.fallbacks[reason] = self.fallbacks.get(reason, 0) + 1
+        return reason
+
+    def stats(self):
+        return {
+            "model": self.model_name,
+            "loaded": self._model is not None,
+            "pending": self._pending,
+            "fallbacks": dict(self.fallbacks),
+            "cache": self.cache.stats(),
+        }
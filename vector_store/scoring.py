@@ -0,0 +1,81 @@
+from typing import Dict, Optional
+
+import numpy as np
+
+EPSILON = 1e-12
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    """Return float32 vectors scaled to unit length (zero vectors stay zero)."""
+    array = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(array, axis=-1, keepdims=True)
+    return array / np.maximum(norms, EPSILON)
+
+
+def weighted_scores(job_embedding: Dict[str, np.ndarray], candidate_embeddings: Dict[str, np.ndarray],
+                    weights: Dict[str, float], normalized: bool = False) -> np.ndarray:
+    """Score M candidates against one job in a single pass per section.
+
+    ``job_embedding`` maps a section to the job's vector and
+    ``candidate_embeddings`` maps a section to an (M, dim) matrix holding
+    every candidate's vector for it. The score of a candidate is the sum of
+    its per-section cosine similarities times the section weight (1.0 when
+    unweighted). Sections the job does not have are skipped. Pass
+    ``normalized=True`` when the vectors are already unit length.
+    """
+    scores = None
+    for section, matrix in candidate_embeddings.items():
+        if section not in job_embedding:
+            continue
+        candidates = np.atleast_2d(np.asarray(matrix, dtype=np.float32))
+        query = np.asarray(job_embedding[section], dtype=np.float32)
+        if not normalized:
+            candidates = normalize_rows(candidates)
+            query = normalize_rows(query)
+        section_scores = candidates @ query
+        section_scores *= np.float32(weights.get(section, 1.0))
+        scores = section_scores if scores is None else scores + section_scores
+
+    if scores is None:
+        count = max((np.atleast_2d(m).shape[0] for m in candidate_embeddings.values()), default=0)
+        return np.zeros(count, dtype=np.float32)
+    return scores
+
+
+def top_k(scores: np.ndarray, k: Optional[int]) -> np.ndarray:
+    """Indices of the ``k`` highest scores, best first."""
+    if k is None or k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best], kind="stable")]
+
+
+def fuse_rankings(section_scores: Dict[str, Dict[str, float]], weights: Dict[str, float],
+                  method: str = "weighted", rrf_k: int = 60) -> Dict[str, float]:
+    """Fuse per-section scores of entities into one score per entity.
+
+    ``section_scores`` maps a section to ``{entity_id: best score}``.
+    ``weighted`` averages the section scores with ``weights`` (an entity
+    missing from a section contributes 0 for it); ``rrf`` is reciprocal-rank
+    fusion, summing ``weight / (rrf_k + rank)`` over the sections.
+    """
+    fused: Dict[str, float] = {}
+    if method == "rrf":
+        for section, scores in section_scores.items():
+            weight = weights.get(section, 1.0)
+            ranked = sorted(scores, key=scores.get, reverse=True)
+            for rank, entity_id in enumerate(ranked, start=1):
+                fused[entity_id] = fused.get(entity_id, 0.0) + weight / (rrf_k + rank)
+        return fused
+
+    if method != "weighted":
+        raise ValueError(f"Unknown fusion method: {method}")
+
+    total_weight = sum(weights.get(section, 1.0) for section in section_scores) or 1.0
+    for section, scores in section_scores.items():
+        weight = weights.get(section, 1.0)
+        for entity_id, score in scores.items():
+            fused[entity_id] = fused.get(entity_id, 0.0) + weight * score / total_weight
+    return fused
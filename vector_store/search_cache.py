@@ -0,0 +1,139 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List
+
+import numpy as np
+
+
+def _stable(value) -> str:
+    # Qdrant filters and search params are pydantic models
+    if value is None:
+        return ""
+    if hasattr(value, "model_dump_json"):
+        return value.model_dump_json(exclude_none=True)
+    if hasattr(value, "json"):
+        return value.json(exclude_none=True)
+    return repr(value)
+
+
+class SearchCache:
+    """Cache of Qdrant search results per collection.
+
+    Keys hash the query vector quantized to float16, so re-encodings of the
+    same text that differ only in float noise share an entry, together with
+    the collection's current generation and the search options. Entries live
+    ``ttl`` seconds and at most ``max_entries`` are kept, least recently used
+    evicted first. ``invalidate`` bumps a collection's generation after a
+    write, which retires all of its entries at once. Identical searches that
+    arrive while one is already running wait for its result instead of
+    querying Qdrant again.
+
+    Everything runs on the event loop, so no locking is needed.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def invalidate(self, collection_name: str):
+        self._generations[collection_name] = self._generations.get(collection_name, 0) + 1
+
+    def key(self, collection_name: str, query_embedding, top_k: int, *options) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"{collection_name}\0{self._generations.get(collection_name, 0)}\0{top_k}".encode("utf-8"))
+        digest.update(np.asarray(query_embedding, dtype=np.float16).tobytes())
+        for option in options:
+            digest.update(b"\0")
+            digest.update(_stable(option).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _lookup(self, key: str, now: float):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _store(self, key: str, value):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_load(self, keys: List[str], load: Callable[[List[int]], Awaitable[List[Any]]]) -> List[Any]:
+        """Results for ``keys``, in order.
+
+        Cached results are returned directly and searches already in flight
+        are awaited. ``load(indices)`` fetches the rest in one call and
+        returns their results in the order of ``indices``.
+        """
+        if not self.enabled:
+            return await load(list(range(len(keys))))
+
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        results: List[Any] = [None] * len(keys)
+        waiting: Dict[int, asyncio.Future] = {}
+        owned: Dict[str, int] = {}  # key -> index loaded for it
+        for index, key in enumerate(keys):
+            value = self._lookup(key, now)
+            if value is not None:
+                self.hits += 1
+                results[index] = value
+                continue
+            future = self._in_flight.get(key)
+            if future is None:
+                self.misses += 1
+                future = self._in_flight[key] = loop.create_future()
+                # Mark failures as retrieved even when nobody else waits on them
+                future.add_done_callback(lambda f: f.cancelled() or f.exception())
+                owned[key] = index
+            else:
+                self.coalesced += 1
+            waiting[index] = future
+
+        if owned:
+            try:
+                values = await load(list(owned.values()))
+            except BaseException as e:
+                for key in owned:
+                    future = self._in_flight.pop(key)
+                    if isinstance(e, asyncio.CancelledError):
+                        future.cancel()
+                    else:
+                        future.set_exception(e)
+                raise
+            for key, value in zip(owned, values):
+                self._store(key, value)
+                self._in_flight.pop(key).set_result(value)
+
+        for index, future in waiting.items():
+            results[index] = await asyncio.shield(future)
+        return results
+
+    def stats(self):
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "in_flight": len(self._in_flight),
+        }
@@ -1,47 +1,285 @@
+import asyncio
 import logging
-from typing import Any, Dict, List
-import qdrant_client
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Tuple
+import httpx
+import numpy as np
+from qdrant_client import AsyncQdrantClient
 from qdrant_client.http import models as qdrant_models
-from transformers import pipeline
-from sklearn.metrics.pairwise import cosine_similarity
-import os
 import uuid
+import config
+import metrics
+from reranker import CrossEncoderReranker, text_hash
+from search_cache import SearchCache
+from scoring import fuse_rankings, top_k as top_k_indices, weighted_scores
 
 
-client = qdrant_client.QdrantClient(host='qdrant', port='6333')
-# reranker_model = pipeline("text-classification", model="bert-base-uncased")
-
-# 1. Create Collection (to be called during system initialization)
-def create_resume_collection():
-    client.recreate_collection(
-        collection_name="ResumeCollection",
-        vectors_config=qdrant_models.VectorParams(
-            size=768,  # Adjust the size to match your embedding dimensions
-            distance=qdrant_models.Distance.COSINE
-        )
+# Every route awaits Qdrant through this client, so a slow search or upsert
+# no longer blocks uvicorn's event loop for other requests. Creating it does
+# not contact Qdrant; warmup() checks the connection once the app runs.
+if config.QDRANT_LOCATION == ":memory:":
+    client = AsyncQdrantClient(location=":memory:")
+elif config.QDRANT_LOCATION:
+    client = AsyncQdrantClient(path=config.QDRANT_LOCATION)
+else:
+    client = AsyncQdrantClient(
+        url=config.QDRANT_URL,
+        host=None if config.QDRANT_URL else config.QDRANT_HOST,
+        port=config.QDRANT_PORT,
+        grpc_port=config.QDRANT_GRPC_PORT,
+        prefer_grpc=config.QDRANT_PREFER_GRPC,
+        timeout=config.QDRANT_CLIENT_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=config.QDRANT_POOL_SIZE,
+            max_keepalive_connections=config.QDRANT_POOL_SIZE
+        ),
+        check_compatibility=False
     )
+# Second-stage scorer for rerank_entities(); its model loads on first use
+reranker = CrossEncoderReranker(
+    config.RERANK_MODEL,
+    batch_size=config.RERANK_BATCH_SIZE,
+    max_pending=config.RERANK_MAX_PENDING,
+    cache_size=config.RERANK_CACHE_SIZE,
+    num_threads=config.RERANK_NUM_THREADS
+)
 
-# 2. Add Resume
-def add_resume(resume_id: str, ids: List[str], vectors: List[List[float]], payloads: List[Dict[str, Any]]):
-    if not vectors:
-        logging.error(f"No valid embeddings to add for resume: {resume_id}")
-        return
-    formatted_ids = [str(uuid.UUID(id_str)) for id_str in ids]
 
-    client.upsert(
-        collection_name="ResumeCollection",
-        points=qdrant_models.Batch(
-            ids=formatted_ids,
-            vectors=vectors,
-            payloads=payloads
+# Hot searches are answered from here; writes to a collection invalidate it
+search_cache = SearchCache(max_entries=config.SEARCH_CACHE_SIZE, ttl=config.SEARCH_CACHE_TTL)
+metrics.register_caches(search_cache, reranker)
+
+
+# Vectors stay NumPy arrays inside the service; the Qdrant point models only
+# take plain lists, so convert once at the client boundary.
+def _as_lists(vectors):
+    return vectors.tolist() if isinstance(vectors, np.ndarray) else vectors
+
+
+# Payload fields naming the resume/job a point belongs to, preferred first
+ENTITY_ID_FIELDS = {
+    "ResumeCollection": ("resume_id",),
+    "JobCollection": ("job_id", "jobId"),
+}
+ENTITY_TYPES = {"ResumeCollection": "resume", "JobCollection": "job"}
+
+# Point ids are UUIDv5 of "<entity type>:<entity id>:<section>", so writing an
+# entity again overwrites its points instead of adding duplicates. Keep in
+# sync with point_id() in the embedding service.
+POINT_ID_NAMESPACE = uuid.UUID("5b6c0d1e-8f3a-4e27-9c41-7a2d9e0b3f68")
+
+
+def point_id(entity_type: str, entity_id: str, section: str) -> str:
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{entity_type}:{entity_id}:{section}"))
+
+
+def _payload_entity_id(collection_name: str, payload: Dict[str, Any]) -> Optional[str]:
+    for key in ENTITY_ID_FIELDS.get(collection_name, ()):
+        if payload.get(key) is not None:
+            return str(payload[key])
+    return None
+
+
+def _entity_id(collection_name: str, point) -> str:
+    return _payload_entity_id(collection_name, point.payload or {}) or str(point.id)
+
+
+def _entity_filter(collection_name: str, entity_ids: List[str], section: str = None) -> qdrant_models.Filter:
+    # Ids may have been stored as strings or, for numeric ids, as integers
+    values = [str(entity_id) for entity_id in entity_ids]
+    numbers = [int(value) for value in values if value.isdigit()]
+    should = []
+    for field in ENTITY_ID_FIELDS[collection_name]:
+        should.append(qdrant_models.FieldCondition(key=field, match=qdrant_models.MatchAny(any=values)))
+        if numbers:
+            should.append(qdrant_models.FieldCondition(key=field, match=qdrant_models.MatchAny(any=numbers)))
+    must = [qdrant_models.FieldCondition(key="section", match=qdrant_models.MatchValue(value=section))] if section else None
+    return qdrant_models.Filter(must=must, should=should)
+
+
+async def _search(collection_name: str, query_embedding, top_k: int, query_filter=None, threshold: float = None,
+                  search_params=None):
+    async def load(_):
+        # query_points replaces the removed client.search; Qdrant enforces the
+        # timeout server-side and wait_for bounds the whole round trip.
+        with metrics.timed("qdrant_search"):
+            response = await asyncio.wait_for(
+                client.query_points(
+                    collection_name=collection_name,
+                    query=np.asarray(query_embedding, dtype=np.float32),
+                    limit=top_k,
+                    query_filter=query_filter,
+                    score_threshold=threshold,
+                    search_params=search_params,
+                    timeout=config.QDRANT_SEARCH_TIMEOUT
+                ),
+                timeout=config.QDRANT_SEARCH_TIMEOUT + 1
+            )
+        return [response.points]
+
+    key = search_cache.key(collection_name, query_embedding, top_k, query_filter, threshold, search_params)
+    results = await search_cache.get_or_load([key], load)
+    return results[0]
+
+
+async def _search_batch(collection_name: str, requests: List[qdrant_models.QueryRequest]):
+    async def load(indices):
+        # One round trip for all uncached query vectors; Qdrant runs them as a batch.
+        metrics.BATCH_SIZE.labels("search_batch").observe(len(indices))
+        with metrics.timed("qdrant_search_batch"):
+            responses = await asyncio.wait_for(
+                client.query_batch_points(
+                    collection_name=collection_name,
+                    requests=[requests[i] for i in indices],
+                    timeout=config.QDRANT_SEARCH_TIMEOUT
+                ),
+                timeout=config.QDRANT_SEARCH_TIMEOUT + 1
+            )
+        return [response.points for response in responses]
+
+    keys = [
+        search_cache.key(collection_name, request.query, request.limit, request.filter, request.score_threshold,
+                         request.params)
+        for request in requests
+    ]
+    return await search_cache.get_or_load(keys, load)
+
+
+async def _write(operation):
+    return await asyncio.wait_for(operation, timeout=config.QDRANT_WRITE_TIMEOUT)
+
+
+# Collections being rebuilt. The target of a rebuild is published as the
+# Qdrant alias "<alias>_rebuild", so every replica, and this one after a
+# restart, mirrors writes to the alias into it until swap_alias. Replicas
+# look the alias up at most every REBUILD_TARGET_TTL seconds, keeping
+# (looked up at, target) per alias here.
+REBUILD_SUFFIX = "_rebuild"
+_rebuild_targets: Dict[str, Tuple[float, Optional[str]]] = {}
+
+# Point ids written or deleted through the mirror while this process copies
+# into a rebuild target; copy_collection skips them and re-syncs them before
+# the swap. Only targets being copied here have an entry.
+_mirrored_ids: Dict[str, set] = {}
+# Writes in progress in this process; prepare_collection waits for the ones
+# that looked up the rebuild target before it was published. While
+# _writes_resumed is set, around a swap, new writes wait for it.
+_writes_in_flight: set = set()
+_writes_resumed: Optional[asyncio.Future] = None
+
+
+async def _writes_open():
+    while _writes_resumed is not None:
+        await asyncio.shield(_writes_resumed)
+
+
+async def _rebuild_target(alias: str, refresh: bool = False) -> Optional[str]:
+    if alias not in COLLECTION_ALIASES:
+        return None
+    cached = _rebuild_targets.get(alias)
+    if not refresh and cached is not None and time.monotonic() - cached[0] < config.REBUILD_TARGET_TTL:
+        return cached[1]
+    target = await _collection_for_alias(alias + REBUILD_SUFFIX)
+    _rebuild_targets[alias] = (time.monotonic(), target)
+    return target
+
+
+# Mirrored ids are recorded before the write, so a copy skips them, and
+# again once it landed, so a re-sync pass that read the source too early
+# runs once more
+def _track_mirrored(target: Optional[str], ids: List[str]):
+    if ids and target in _mirrored_ids:
+        _mirrored_ids[target].update(ids)
+
+
+def _upserted_ids(points) -> List[str]:
+    if isinstance(points, qdrant_models.Batch):
+        return [str(point) for point in points.ids]
+    return [str(point.id) for point in points]
+
+
+async def _selected_ids(collection_name: str, points_selector) -> List[str]:
+    if isinstance(points_selector, qdrant_models.PointIdsList):
+        return [str(point) for point in points_selector.points]
+    ids = []
+    offset = None
+    while True:
+        records, offset = await client.scroll(
+            collection_name=collection_name,
+            scroll_filter=points_selector.filter,
+            limit=1000,
+            offset=offset,
+            with_payload=False,
+            with_vectors=False
         )
+        ids.extend(str(record.id) for record in records)
+        if offset is None:
+            return ids
+
+
+async def _upsert(alias: str, points):
+    metrics.BATCH_SIZE.labels("upsert").observe(
+        len(points.ids) if isinstance(points, qdrant_models.Batch) else len(points)
     )
+    await _writes_open()
+    done = asyncio.get_running_loop().create_future()
+    _writes_in_flight.add(done)
+    try:
+        with metrics.timed("qdrant_upsert"):
+            target = await _rebuild_target(alias)
+            mirrored = _upserted_ids(points) if target in _mirrored_ids else None
+            _track_mirrored(target, mirrored)
+            await asyncio.gather(*[
+                _write(client.upsert(collection_name=name, points=points))
+                for name in filter(None, (alias, target))
+            ])
+            _track_mirrored(target, mirrored)
+    finally:
+        _writes_in_flight.discard(done)
+        done.set_result(None)
+        search_cache.invalidate(alias)
 
 
-# 3. Search Resumes
-def search_resumes(query_embedding, section: str, top_k: int = 10, metadata_filters: dict = None):
+async def _delete(alias: str, points_selector):
+    await _writes_open()
+    done = asyncio.get_running_loop().create_future()
+    _writes_in_flight.add(done)
+    try:
+        with metrics.timed("qdrant_delete"):
+            target = await _rebuild_target(alias)
+            mirrored = await _selected_ids(alias, points_selector) if target in _mirrored_ids else None
+            _track_mirrored(target, mirrored)
+            await asyncio.gather(*[
+                _write(client.delete(collection_name=name, points_selector=points_selector))
+                for name in filter(None, (alias, target))
+            ])
+            _track_mirrored(target, mirrored)
+    finally:
+        _writes_in_flight.discard(done)
+        done.set_result(None)
+        search_cache.invalidate(alias)
+
+
+def _search_params(hnsw_ef: int = None, exact: bool = False, rescore: bool = None, oversampling: float = None):
+    # Per-query recall/latency trade-off: a larger hnsw_ef explores more of
+    # the graph, exact skips the index and scans every (filtered) point.
+    # On quantized collections rescore/oversampling decide how many
+    # candidates are re-ranked with the original vectors kept on disk.
+    hnsw_ef = hnsw_ef or config.SEARCH_HNSW_EF
+    rescore = config.SEARCH_RESCORE if rescore is None else rescore
+    oversampling = oversampling or config.SEARCH_OVERSAMPLING
+    quantization = None
+    if config.QUANTIZATION != "none" or oversampling or rescore is False:
+        quantization = qdrant_models.QuantizationSearchParams(rescore=rescore, oversampling=oversampling)
+    if not hnsw_ef and not exact and quantization is None:
+        return None
+    return qdrant_models.SearchParams(hnsw_ef=hnsw_ef, exact=exact, quantization=quantization)
+
+
+def _build_filter(section: str = None, metadata_filters: dict = None):
     filters = []
-    
+
     # Add metadata filters if any
     if metadata_filters:
         for key, value in metadata_filters.items():
@@ -50,76 +288,561 @@ def search_resumes(query_embedding, section: str, top_k: int = 10, metadata_filt
                 match=qdrant_models.MatchValue(value=value)
             ))
 
-    filters.append(qdrant_models.FieldCondition(
-        key="section",
-        match=qdrant_models.MatchValue(value=section)
+    if section:
+        filters.append(qdrant_models.FieldCondition(
+            key="section",
+            match=qdrant_models.MatchValue(value=section)
+        ))
+
+    return qdrant_models.Filter(must=filters) if filters else None
+
+
+async def search_batch(collection_name: str, queries: List[Dict[str, Any]], default_top_k: int = 10,
+                       default_threshold: float = None):
+    """Run several searches against one collection in a single Qdrant call.
+
+    Each query is a dict with ``query_embedding`` and optional ``section``,
+    ``metadata_filters``, ``top_k``, ``threshold``, ``hnsw_ef``, ``exact``,
+    ``rescore`` and ``oversampling``.
+    Results come back in query order.
+    """
+    if not queries:
+        return []
+
+    requests = []
+    for query in queries:
+        threshold = query.get("threshold")
+        requests.append(qdrant_models.QueryRequest(
+            query=_as_lists(np.asarray(query["query_embedding"], dtype=np.float32)),
+            filter=_build_filter(query.get("section"), query.get("metadata_filters")),
+            limit=query.get("top_k") or default_top_k,
+            score_threshold=default_threshold if threshold is None else threshold,
+            params=_search_params(query.get("hnsw_ef"), query.get("exact", False),
+                                  query.get("rescore"), query.get("oversampling")),
+            with_payload=True
+        ))
+
+    return await _search_batch(collection_name, requests)
+
+PAYLOAD_SCHEMAS = {
+    "keyword": qdrant_models.PayloadSchemaType.KEYWORD,
+    "integer": qdrant_models.PayloadSchemaType.INTEGER,
+    "float": qdrant_models.PayloadSchemaType.FLOAT,
+    "bool": qdrant_models.PayloadSchemaType.BOOL,
+    "datetime": qdrant_models.PayloadSchemaType.DATETIME,
+}
+
+
+def _quantization_config(mode: str):
+    if mode == "scalar":
+        return qdrant_models.ScalarQuantization(scalar=qdrant_models.ScalarQuantizationConfig(
+            type=qdrant_models.ScalarType.INT8,
+            quantile=config.SCALAR_QUANTILE,
+            always_ram=config.QUANTIZATION_ALWAYS_RAM
+        ))
+    if mode == "binary":
+        return qdrant_models.BinaryQuantization(binary=qdrant_models.BinaryQuantizationConfig(
+            always_ram=config.QUANTIZATION_ALWAYS_RAM
+        ))
+    if mode == "none":
+        return None
+    raise ValueError(f"Unknown quantization mode '{mode}', expected none, scalar or binary")
+
+
+async def _create_collection(collection_name: str):
+    quantization_config = _quantization_config(config.QUANTIZATION)
+    await client.create_collection(
+        collection_name=collection_name,
+        vectors_config=qdrant_models.VectorParams(
+            size=768,  # Adjust the size to match your embedding dimensions
+            distance=qdrant_models.Distance.COSINE,
+            # Quantized collections keep the originals on disk for rescoring
+            on_disk=config.VECTORS_ON_DISK or quantization_config is not None
+        ),
+        hnsw_config=qdrant_models.HnswConfigDiff(
+            m=config.HNSW_M,
+            ef_construct=config.HNSW_EF_CONSTRUCT,
+            on_disk=config.HNSW_ON_DISK
+        ),
+        quantization_config=quantization_config,
+        on_disk_payload=config.PAYLOAD_ON_DISK
+    )
+    await create_payload_indexes(collection_name)
+
+
+# Switch an existing collection to another quantization mode. Qdrant
+# rebuilds the quantized copy from the stored vectors, so nothing is
+# re-embedded; the collection keeps serving searches meanwhile.
+async def requantize_collection(alias: str, mode: str):
+    quantization_config = _quantization_config(mode)
+    # Collection settings are changed on the collection behind the alias
+    collection_name = await _current_collection(alias) or alias
+    await client.update_collection(
+        collection_name=collection_name,
+        vectors_config={"": qdrant_models.VectorParamsDiff(
+            on_disk=config.VECTORS_ON_DISK or quantization_config is not None
+        )},
+        quantization_config=quantization_config or qdrant_models.Disabled.DISABLED,
+        timeout=config.QDRANT_WRITE_TIMEOUT
+    )
+    search_cache.invalidate(alias)
+
+
+# Index "section" and the configured metadata fields so filtered searches
+# use the payload index instead of scanning. Safe to re-run.
+async def create_payload_indexes(collection_name: str):
+    collection_name = await _current_collection(collection_name) or collection_name
+    for field_name, schema in config.payload_index_fields().items():
+        if schema not in PAYLOAD_SCHEMAS:
+            raise ValueError(f"Unsupported payload index type '{schema}' for field '{field_name}'")
+        await _write(client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field_name,
+            field_schema=PAYLOAD_SCHEMAS[schema]
+        ))
+
+
+# Blue/green rebuilds. "ResumeCollection" and "JobCollection" are Qdrant
+# aliases for versioned collections (e.g. ResumeCollection_v1718000000000),
+# and everything in this module addresses the alias. A rebuild fills a new
+# version and then repoints the alias atomically, so searches never see a
+# missing or half-filled collection.
+COLLECTION_ALIASES = ("ResumeCollection", "JobCollection")
+
+
+async def _collection_for_alias(alias: str) -> Optional[str]:
+    response = await client.get_aliases()
+    for description in response.aliases:
+        if description.alias_name == alias:
+            return description.collection_name
+    return None
+
+
+async def _collection_exists(collection_name: str) -> bool:
+    response = await client.get_collections()
+    return any(collection.name == collection_name for collection in response.collections)
+
+
+async def _current_collection(alias: str) -> Optional[str]:
+    # Deployments from before aliases have a real collection under the alias name
+    current = await _collection_for_alias(alias)
+    if current is None and await _collection_exists(alias):
+        current = alias
+    return current
+
+
+# Create an empty versioned collection for the alias and start mirroring
+# writes into it. Fill it by copying or re-ingesting, then call swap_alias.
+# A rebuild that was prepared but never swapped is replaced. With
+# ``track_writes`` the mirrored point ids are recorded for copy_collection.
+async def prepare_collection(alias: str, track_writes: bool = False) -> str:
+    if alias not in COLLECTION_ALIASES:
+        raise ValueError(f"Unknown collection alias '{alias}'")
+    collection_name = f"{alias}_v{int(time.time() * 1000)}"
+    await _create_collection(collection_name)
+    if track_writes:
+        _mirrored_ids[collection_name] = set()
+
+    abandoned = await _rebuild_target(alias, refresh=True)
+    operations = []
+    if abandoned is not None:
+        operations.append(qdrant_models.DeleteAliasOperation(
+            delete_alias=qdrant_models.DeleteAlias(alias_name=alias + REBUILD_SUFFIX)
+        ))
+    operations.append(qdrant_models.CreateAliasOperation(
+        create_alias=qdrant_models.CreateAlias(collection_name=collection_name, alias_name=alias + REBUILD_SUFFIX)
     ))
+    await client.update_collection_aliases(change_aliases_operations=operations, timeout=config.QDRANT_WRITE_TIMEOUT)
+    _rebuild_targets[alias] = (time.monotonic(), collection_name)
+    # Writes that started earlier did not see the target, here or in other
+    # replicas until their cached lookup expires; a copy must not read the
+    # source before they land in it, nor may they hit a dropped collection
+    await asyncio.sleep(config.REBUILD_TARGET_TTL)
+    if _writes_in_flight:
+        await asyncio.wait(set(_writes_in_flight))
+    if abandoned is not None:
+        logging.warning(f"Dropping unfinished rebuild {abandoned} of {alias}")
+        _mirrored_ids.pop(abandoned, None)
+        await client.delete_collection(collection_name=abandoned)
+    return collection_name
 
-    query_filter = qdrant_models.Filter(must=filters) if filters else None
 
-    # Perform the search with the filter
-    results = client.search(
-        collection_name="ResumeCollection",
-        query_vector=query_embedding,
-        limit=top_k,
-        query_filter=query_filter
+async def _cancel_rebuild(alias: str, collection_name: str):
+    if await _rebuild_target(alias, refresh=True) == collection_name:
+        await client.update_collection_aliases(change_aliases_operations=[qdrant_models.DeleteAliasOperation(
+            delete_alias=qdrant_models.DeleteAlias(alias_name=alias + REBUILD_SUFFIX)
+        )], timeout=config.QDRANT_WRITE_TIMEOUT)
+        _rebuild_targets[alias] = (time.monotonic(), None)
+    _mirrored_ids.pop(collection_name, None)
+
+
+# Copy every point with parallel batched upserts (bounded in flight). Points
+# the mirror already wrote or deleted in the target are skipped, since the
+# scrolled copy may be older.
+async def copy_collection(source: str, target: str, batch_size: int = None, parallel: int = None) -> int:
+    batch_size = batch_size or config.COPY_BATCH_SIZE
+    parallel = max(parallel or config.COPY_PARALLEL, 1)
+    mirrored = _mirrored_ids.setdefault(target, set())
+    in_flight = set()
+    copied = 0
+    offset = None
+
+    while True:
+        records, offset = await client.scroll(
+            collection_name=source,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True
+        )
+        records = [r for r in records if str(r.id) not in mirrored]
+        if records:
+            if len(in_flight) >= parallel:
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    task.result()
+            points = [qdrant_models.PointStruct(id=r.id, vector=r.vector, payload=r.payload) for r in records]
+            in_flight.add(asyncio.ensure_future(_write(client.upsert(collection_name=target, points=points))))
+            copied += len(records)
+        if offset is None:
+            break
+
+    if in_flight:
+        await asyncio.gather(*in_flight)
+    return copied
+
+
+# A copied batch can still land after a mirrored write to the same point.
+# One pass makes every point the mirror touched so far match the source
+# again and returns how many it checked.
+async def _resync_mirrored(source: str, target: str, batch_size: int = None) -> int:
+    batch_size = batch_size or config.COPY_BATCH_SIZE
+    ids = list(_mirrored_ids.get(target) or ())
+    _mirrored_ids[target] = set()
+    for start in range(0, len(ids), batch_size):
+        chunk = ids[start:start + batch_size]
+        records = await client.retrieve(collection_name=source, ids=chunk, with_payload=True, with_vectors=True)
+        if records:
+            await _write(client.upsert(
+                collection_name=target,
+                points=[qdrant_models.PointStruct(id=r.id, vector=r.vector, payload=r.payload) for r in records]
+            ))
+        present = {str(r.id) for r in records}
+        deleted = [point for point in chunk if point not in present]
+        if deleted:
+            await _write(client.delete(
+                collection_name=target, points_selector=qdrant_models.PointIdsList(points=deleted)
+            ))
+    return len(ids)
+
+
+# Hold new writes in this process and wait for the running ones, so a final
+# re-sync pass and the swap cannot race with them
+@asynccontextmanager
+async def _writes_paused():
+    global _writes_resumed
+    await _writes_open()
+    resumed = _writes_resumed = asyncio.get_running_loop().create_future()
+    try:
+        if _writes_in_flight:
+            await asyncio.wait(set(_writes_in_flight))
+        yield
+    finally:
+        _writes_resumed = None
+        resumed.set_result(None)
+
+
+# Point the alias at its prepared rebuild target in one alias update, which
+# also stops the mirroring. Refuses collections that were not prepared, so a
+# swap never publishes a collection that did not receive the live writes.
+async def swap_alias(alias: str, collection_name: str, drop_old: bool = True) -> Optional[str]:
+    if alias not in COLLECTION_ALIASES:
+        raise ValueError(f"Unknown collection alias '{alias}'")
+    if await _rebuild_target(alias, refresh=True) != collection_name:
+        raise ValueError(f"{collection_name} is not the prepared rebuild of {alias}; call /collection/prepare first")
+    previous = await _collection_for_alias(alias)
+    operations = [qdrant_models.DeleteAliasOperation(
+        delete_alias=qdrant_models.DeleteAlias(alias_name=alias + REBUILD_SUFFIX)
+    )]
+    if previous is not None:
+        operations.append(qdrant_models.DeleteAliasOperation(
+            delete_alias=qdrant_models.DeleteAlias(alias_name=alias)
+        ))
+    elif await _collection_exists(alias):
+        # A pre-alias collection holds the name; it has to be dropped before
+        # the alias can take it, which leaves a short gap this one time.
+        logging.warning(f"Replacing legacy collection {alias} with an alias to {collection_name}")
+        await client.delete_collection(collection_name=alias)
+    operations.append(qdrant_models.CreateAliasOperation(
+        create_alias=qdrant_models.CreateAlias(collection_name=collection_name, alias_name=alias)
+    ))
+
+    await client.update_collection_aliases(change_aliases_operations=operations, timeout=config.QDRANT_WRITE_TIMEOUT)
+    _rebuild_targets[alias] = (time.monotonic(), None)
+    search_cache.invalidate(alias)
+    _mirrored_ids.pop(collection_name, None)
+
+    if drop_old and previous is not None and previous != collection_name:
+        await client.delete_collection(collection_name=previous)
+    return previous
+
+
+async def rebuild_collection(alias: str, copy_points: bool = True, drop_old: bool = True) -> Dict[str, Any]:
+    """Build a new version of the collection behind ``alias`` and swap to it.
+
+    The new version gets the current collection config (HNSW, quantization,
+    payload indexes). With ``copy_points`` the existing points are copied
+    over, otherwise it starts empty.
+    """
+    source = await _current_collection(alias)
+    target = await prepare_collection(alias, track_writes=copy_points)
+    try:
+        copied = 0
+        if copy_points and source:
+            copied = await copy_collection(source, target)
+            # Catch up while writes continue, then pause them for the last pass
+            for _ in range(3):
+                if not await _resync_mirrored(source, target):
+                    break
+        async with _writes_paused():
+            if copy_points and source:
+                await _resync_mirrored(source, target)
+            await swap_alias(alias, target, drop_old=drop_old)
+    except Exception:
+        await _cancel_rebuild(alias, target)
+        raise
+    return {"alias": alias, "collection_name": target, "previous": source, "copied": copied}
+
+# Upsert the section points of one or more entities. Without ids they are
+# derived from each payload's entity id and section, which makes re-adding an
+# entity idempotent.
+async def _add_points(collection_name: str, entity_id: str, ids: Optional[List[str]], vectors: np.ndarray,
+                      payloads: List[Dict[str, Any]]):
+    if ids:
+        point_ids = [str(uuid.UUID(id_str)) for id_str in ids]
+    else:
+        entity_type = ENTITY_TYPES[collection_name]
+        point_ids = [
+            point_id(entity_type, _payload_entity_id(collection_name, payload) or entity_id, payload.get("section"))
+            for payload in payloads
+        ]
+    await _upsert(
+        collection_name,
+        qdrant_models.Batch(
+            ids=point_ids,
+            vectors=_as_lists(vectors),
+            payloads=payloads
+        )
     )
-    return results
 
-# 4. Update Resume
-def update_resume(resume_id: str, section: str, new_vector):
-    client.upsert(
-        collection_name="ResumeCollection",
-        points=[qdrant_models.PointStruct(
-            id=resume_id + "_" + section,
-            vector=new_vector,
-            payload={"section": section}
+
+# Replace the vector of one section, keeping the point's id and payload.
+# The stored content_hash no longer describes the vector, so it is dropped
+# and the next /api/embed of the section re-embeds it.
+async def _update_section(collection_name: str, entity_id: str, section: str, new_vector):
+    records, _ = await client.scroll(
+        collection_name=collection_name,
+        scroll_filter=_entity_filter(collection_name, [entity_id], section),
+        limit=16,
+        with_payload=True
+    )
+    if not records:
+        field = ENTITY_ID_FIELDS[collection_name][0]
+        records = [qdrant_models.Record(
+            id=point_id(ENTITY_TYPES[collection_name], entity_id, section),
+            payload={"section": section, field: entity_id}
         )]
+    await _upsert(
+        collection_name,
+        [
+            qdrant_models.PointStruct(
+                id=r.id,
+                vector=_as_lists(new_vector),
+                payload={key: value for key, value in (r.payload or {}).items() if key != "content_hash"}
+            )
+            for r in records
+        ]
     )
 
-# 5. Delete Resume
-def delete_resume(resume_id: str):
-    point_ids = [f"{resume_id}_skills", f"{resume_id}_experience", f"{resume_id}_education"]
-    client.delete(
-        collection_name="ResumeCollection",
-        points_selector=qdrant_models.PointIdsList(point_ids=point_ids)
+
+# Look up points by id, e.g. to compare stored section fingerprints
+async def get_points(collection_name: str, ids: List[str], with_vectors: bool = False):
+    return await asyncio.wait_for(
+        client.retrieve(
+            collection_name=collection_name,
+            ids=[str(uuid.UUID(id_str)) for id_str in ids],
+            with_payload=["content_hash"],
+            with_vectors=with_vectors
+        ),
+        timeout=config.QDRANT_SEARCH_TIMEOUT
     )
 
-# 6. Rerank Search Results using BERT/T5 (after initial cosine similarity search)
-# def rerank_results(job_description, resume_results):
-#     reranked = []
-#     for result in resume_results:
-#         resume_id = result.id
-#         resume_text = result.payload.get('full_text', '')  # Assume full_text is stored
-#         relevance_score = reranker_model(job_description, resume_text)[0]['score']
-#         reranked.append((resume_id, relevance_score))
-    
-    # return sorted(reranked, key=lambda x: x[1], reverse=True)
+
+# Delete every point of the given entities, matched on their entity id field
+async def delete_entities(collection_name: str, entity_ids: List[str]):
+    if not entity_ids:
+        return
+    await _delete(collection_name, qdrant_models.FilterSelector(filter=_entity_filter(collection_name, entity_ids)))
+
+
+# Readiness: set once Qdrant has answered and the collections were warmed
+readiness = {"ready": False, "error": None, "warmup_seconds": None}
+
+
+async def warmup():
+    """Check that Qdrant answers and run one small search per collection.
+
+    The first search of a collection pays for loading its index and
+    vectors; doing it here keeps that off the first real request.
+    """
+    started = time.perf_counter()
+    try:
+        response = await asyncio.wait_for(client.get_collections(), timeout=config.QDRANT_SEARCH_TIMEOUT)
+        names = {collection.name for collection in response.collections}
+        for alias in COLLECTION_ALIASES:
+            collection_name = alias if alias in names else await _collection_for_alias(alias)
+            if collection_name is None:
+                continue
+            info = await client.get_collection(collection_name=collection_name)
+            vectors = info.config.params.vectors
+            probe = np.random.default_rng().standard_normal(vectors.size).astype(np.float32)
+            await _search(alias, probe, top_k=1)
+    except Exception as e:
+        readiness["error"] = str(e) or type(e).__name__
+        raise
+    readiness.update(ready=True, error=None, warmup_seconds=round(time.perf_counter() - started, 3))
+    return readiness
+
+
+# 1. Create Collection (to be called during system initialization)
+async def create_resume_collection():
+    return await rebuild_collection("ResumeCollection")
+
+# 2. Add Resume
+async def add_resume(resume_id: str, ids: List[str], vectors: np.ndarray, payloads: List[Dict[str, Any]]):
+    if not len(vectors):
+        logging.error(f"No valid embeddings to add for resume: {resume_id}")
+        return
+    await _add_points("ResumeCollection", resume_id, ids, vectors, payloads)
+
+
+# 3. Search Resumes
+async def search_resumes(query_embedding, section: str, top_k: int = 10, metadata_filters: dict = None,
+                         hnsw_ef: int = None, exact: bool = False, rescore: bool = None, oversampling: float = None):
+    query_filter = _build_filter(section, metadata_filters)
+
+    # Perform the search with the filter
+    return await _search("ResumeCollection", query_embedding, top_k, query_filter,
+                         search_params=_search_params(hnsw_ef, exact, rescore, oversampling))
+
+
+# 3b. Search Resumes for several query vectors in one call
+async def search_resumes_batch(queries: List[Dict[str, Any]]):
+    return await search_batch("ResumeCollection", queries, default_top_k=10)
+
+# 4. Update Resume
+async def update_resume(resume_id: str, section: str, new_vector):
+    await _update_section("ResumeCollection", resume_id, section, new_vector)
+
+# 5. Delete Resume
+async def delete_resume(resume_id: str):
+    await delete_entities("ResumeCollection", [resume_id])
+
+
+async def delete_resumes(resume_ids: List[str]):
+    await delete_entities("ResumeCollection", resume_ids)
+
+# 6. Rerank Search Results with a cross-encoder (after initial cosine similarity search)
+async def rerank_entities(collection_name: str, query_text: str, query_embedding, section: str = None,
+                          top_k: int = 10, candidates: int = 50, candidate_texts: Dict[str, str] = None,
+                          threshold: float = None, metadata_filters: dict = None, budget_ms: float = None,
+                          hnsw_ef: int = None, exact: bool = False, rescore: bool = None,
+                          oversampling: float = None):
+    """Search ``section`` and rerank the top ``candidates`` hits against ``query_text``.
+
+    A candidate's text is looked up in ``candidate_texts`` by resume/job id
+    or point id, then in its payload's ``RERANK_TEXT_FIELD``; hits without
+    text are kept after the reranked ones. Every result carries both its
+    first-stage ``score`` and its ``rerank_score``. When the cross-encoder
+    cannot score in time (see reranker.py) the first-stage order is returned
+    and ``fallback`` says why.
+    """
+    candidates = min(max(candidates, top_k), config.RERANK_MAX_CANDIDATES)
+    hits = await _search(collection_name, query_embedding, candidates, _build_filter(section, metadata_filters),
+                         threshold, search_params=_search_params(hnsw_ef, exact, rescore, oversampling))
+
+    candidate_texts = candidate_texts or {}
+    results = []
+    scorable = []
+    pairs = []
+    for point in hits:
+        payload = point.payload or {}
+        entity_id = _entity_id(collection_name, point)
+        text = (candidate_texts.get(entity_id) or candidate_texts.get(str(point.id))
+                or payload.get(config.RERANK_TEXT_FIELD))
+        results.append({"id": str(point.id), "entity_id": entity_id, "score": point.score, "rerank_score": None,
+                        "payload": payload})
+        if text:
+            scorable.append(results[-1])
+            pairs.append((text_hash(text), text))
+
+    fallback = None
+    if pairs:
+        budget = (budget_ms if budget_ms is not None else config.RERANK_BUDGET_MS) / 1000.0
+        metrics.BATCH_SIZE.labels("rerank").observe(len(pairs))
+        with metrics.timed("rerank"):
+            scores, fallback = await reranker.score(query_text, pairs, budget)
+        for result, score in zip(scorable, scores):
+            result["rerank_score"] = score
+    elif results:
+        fallback = "no_text"
+
+    if fallback is None:
+        # Stable sort: hits without text keep their first-stage order at the end
+        results.sort(key=lambda result: (result["rerank_score"] is None, -(result["rerank_score"] or 0.0)))
+    return {"results": results[:top_k], "reranked": fallback is None, "fallback": fallback}
+
+
+async def rerank_resumes(query_text: str, query_embedding, **options):
+    return await rerank_entities("ResumeCollection", query_text, query_embedding, **options)
 
 # 7. Weighted Search (use different weights for different resume sections)
 def weighted_search(job_embedding, resume_embeddings, weights):
-    weighted_score = 0.0
-    for section, embedding in resume_embeddings.items():
-        section_score = cosine_similarity([job_embedding[section]], [embedding])[0][0]
-        weighted_score += section_score * weights.get(section, 1.0)
-    
-    return weighted_score
+    # Single job/resume pair: a batch of one candidate
+    candidates = {section: np.asarray(embedding, dtype=np.float32)[None, :]
+                  for section, embedding in resume_embeddings.items()}
+    return float(weighted_scores(job_embedding, candidates, weights)[0])
+
+
+# 7b. Weighted Search over many candidate resumes at once
+def weighted_search_batch(job_embedding, candidate_embeddings, weights, top_k: int = None,
+                          candidate_ids: List[str] = None, normalized: bool = False):
+    scores = weighted_scores(job_embedding, candidate_embeddings, weights, normalized=normalized)
+    ranked = top_k_indices(scores, top_k)
+    return [
+        {
+            "index": int(i),
+            "id": candidate_ids[i] if candidate_ids else None,
+            "score": float(scores[i])
+        }
+        for i in ranked
+    ]
 
 # 8. Task-based Search (specific tasks like leadership or project management)
-def task_based_search(job_tasks, resume_embeddings):
-    task_scores = {}
-    for task, task_embedding in job_tasks.items():
-        task_scores[task] = search_resumes(task_embedding, "experience")  # Focus on experience section
-    return task_scores
+async def task_based_search(job_tasks, resume_embeddings):
+    tasks = list(job_tasks)
+    results = await search_resumes_batch([
+        {"query_embedding": job_tasks[task], "section": "experience"}  # Focus on experience section
+        for task in tasks
+    ])
+    return dict(zip(tasks, results))
 
 # 9. Fuzzy Search (find similar items based on vector similarity)
-def fuzzy_search(query_embedding, collection_name: str, top_k: int = 10, threshold: float = 0.8):
+async def fuzzy_search(query_embedding, collection_name: str, top_k: int = 10, threshold: float = 0.8,
+                       hnsw_ef: int = None, exact: bool = False, rescore: bool = None, oversampling: float = None):
     # Perform the search
-    results = client.search(
-        collection_name=collection_name,
-        query_vector=query_embedding,
-        limit=top_k
-    )
+    results = await _search(collection_name, query_embedding, top_k,
+                            search_params=_search_params(hnsw_ef, exact, rescore, oversampling))
     
     # Filter results based on a similarity threshold
     filtered_results = [result for result in results if result.score >= threshold]
@@ -127,70 +850,112 @@ def fuzzy_search(query_embedding, collection_name: str, top_k: int = 10, thresho
     return filtered_results
 
 
+# 10. Multi-section match (search every section, then fuse per resume/job)
+async def match_entities(collection_name: str, queries: List[Dict[str, Any]], fusion: str = "weighted",
+                         top_k: int = 10, candidates_per_section: int = 50, rrf_k: int = 60,
+                         metadata_filters: dict = None, hnsw_ef: int = None, exact: bool = False,
+                         rescore: bool = None, oversampling: float = None):
+    """Rank whole resumes/jobs from several per-section searches.
+
+    Each query names a ``section`` with its ``query_embedding`` and optional
+    ``weight``/``threshold``. All sections are searched in one batch call,
+    hits are grouped by the owning entity id from the payload (keeping each
+    entity's best score per section) and fused with ``fusion`` ("weighted"
+    or "rrf").
+    """
+    hits = await search_batch(collection_name, [
+        {
+            "query_embedding": query["query_embedding"],
+            "section": query["section"],
+            "top_k": candidates_per_section,
+            "threshold": query.get("threshold"),
+            "metadata_filters": metadata_filters,
+            "hnsw_ef": hnsw_ef,
+            "exact": exact,
+            "rescore": rescore,
+            "oversampling": oversampling
+        }
+        for query in queries
+    ])
+
+    section_scores: Dict[str, Dict[str, float]] = {}
+    weights: Dict[str, float] = {}
+    payloads: Dict[str, dict] = {}
+    for query, points in zip(queries, hits):
+        section = query["section"]
+        weights[section] = query.get("weight", 1.0)
+        scores = section_scores.setdefault(section, {})
+        for point in points:
+            entity_id = _entity_id(collection_name, point)
+            if point.score > scores.get(entity_id, float("-inf")):
+                scores[entity_id] = point.score
+            if entity_id not in payloads:
+                payloads[entity_id] = {k: v for k, v in (point.payload or {}).items() if k != "section"}
+
+    fused = fuse_rankings(section_scores, weights, method=fusion, rrf_k=rrf_k)
+    ranked = sorted(fused, key=fused.get, reverse=True)[:top_k]
+    return [
+        {
+            "id": entity_id,
+            "score": fused[entity_id],
+            "section_scores": {s: scores[entity_id] for s, scores in section_scores.items() if entity_id in scores},
+            "payload": payloads[entity_id]
+        }
+        for entity_id in ranked
+    ]
+
+
+async def match_resumes(queries: List[Dict[str, Any]], **options):
+    return await match_entities("ResumeCollection", queries, **options)
+
+
 ################################ JOBS SECTION #############################################
 
 # Create or update a collection for jobs
-def create_job_collection():
-    client.recreate_collection(
-        collection_name="JobCollection",
-        vectors_config=qdrant_models.VectorParams(
-            size=768,  # Adjust the size based on the embedding dimensions
-            distance=qdrant_models.Distance.COSINE
-        )
-    )
+async def create_job_collection():
+    return await rebuild_collection("JobCollection")
 
 # Add a job to the collection
-def add_job(job_id: str, ids: List[str], vectors: List[List[float]], payloads: List[Dict[str, Any]]):
-    if not vectors:
+async def add_job(job_id: str, ids: List[str], vectors: np.ndarray, payloads: List[Dict[str, Any]]):
+    if not len(vectors):
         logging.error(f"No valid embeddings to add for job: {job_id}")
         return
-    formatted_ids = [str(uuid.UUID(id_str)) for id_str in ids]
-    client.upsert(
-        collection_name="JobCollection",
-        points=qdrant_models.Batch(
-            ids=formatted_ids,
-            vectors=vectors,
-            payloads=payloads
-        )
-    )
+    await _add_points("JobCollection", job_id, ids, vectors, payloads)
 
 # Search for jobs based on query embedding
-def search_jobs(query_embedding, section: str, top_k: int = 20, threshold: float = 0.7):
-    filters = []
-    
-    if section:
-        filters.append(qdrant_models.FieldCondition(
-            key="section",
-            match=qdrant_models.MatchValue(value=section)
-        ))
-
-    query_filter = qdrant_models.Filter(must=filters) if filters else None
+async def search_jobs(query_embedding, section: str, top_k: int = 20, threshold: float = 0.7,
+                      metadata_filters: dict = None, hnsw_ef: int = None, exact: bool = False,
+                      rescore: bool = None, oversampling: float = None):
+    query_filter = _build_filter(section, metadata_filters)
 
     # Perform the search with more lenient parameters
-    results = client.search(
-        collection_name="JobCollection",
-        query_vector=query_embedding,
-        limit=top_k,
-        query_filter=query_filter,
-        score_threshold=threshold  # Add threshold parameter
-    )
-    return results
+    return await _search("JobCollection", query_embedding, top_k, query_filter, threshold,
+                         search_params=_search_params(hnsw_ef, exact, rescore, oversampling))
+
+
+# Search for jobs with several query vectors in one call
+async def search_jobs_batch(queries: List[Dict[str, Any]]):
+    return await search_batch("JobCollection", queries, default_top_k=20, default_threshold=0.7)
 
 # Update a job in the collection
-def update_job(job_id: str, section: str, new_vector):
-    client.upsert(
-        collection_name="JobCollection",
-        points=[qdrant_models.PointStruct(
-            id=f"{job_id}_{section}",
-            vector=new_vector,
-            payload={"section": section}
-        )]
-    )
+async def update_job(job_id: str, section: str, new_vector):
+    await _update_section("JobCollection", job_id, section, new_vector)
 
 # Delete a job from the collection
-def delete_job(job_id: str):
-    point_ids = [f"{job_id}_required_skills", f"{job_id}_responsibilities", f"{job_id}_preferred_qualifications"]
-    client.delete(
-        collection_name="JobCollection",
-        points_selector=qdrant_models.PointIdsList(point_ids=point_ids)
-    )
+async def delete_job(job_id: str):
+    await delete_entities("JobCollection", [job_id])
+
+
+# Delete many jobs at once, e.g. when they expire
+async def delete_jobs(job_ids: List[str]):
+    await delete_entities("JobCollection", job_ids)
+
+
+# Rank whole jobs from several per-section searches
+async def match_jobs(queries: List[Dict[str, Any]], **options):
+    return await match_entities("JobCollection", queries, **options)
+
+
+# Rerank job search hits with the cross-encoder
+async def rerank_jobs(query_text: str, query_embedding, **options):
+    return await rerank_entities("JobCollection", query_text, query_embedding, **options)
@@ -1,8 +1,41 @@
-from fastapi import APIRouter, HTTPException, FastAPI
+import time
+
+started = time.perf_counter()
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, HTTPException, FastAPI, Request
 from Endpoints import router as vector_router
 from fastapi.middleware.cors import CORSMiddleware
+from vector_logic import warmup
+import metrics
+
+logger = logging.getLogger("uvicorn.error")
+logger.info(f"Vector store imported in {time.perf_counter() - started:.2f}s")
+
+
+async def _warm_until_ready():
+    while True:
+        try:
+            result = await warmup()
+            logger.info(f"Vector store ready {time.perf_counter() - started:.2f}s after start "
+                        f"(warmup {result['warmup_seconds']:.2f}s)")
+            return
+        except Exception as e:
+            logger.warning(f"Qdrant not ready yet, retrying: {e}")
+            await asyncio.sleep(2)
+
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    # Warm up in the background so the server accepts liveness checks right away
+    task = asyncio.create_task(_warm_until_ready())
+    yield
+    task.cancel()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 # Configure CORS
@@ -13,5 +46,23 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+
+
+# Request latency per route template (unmatched paths share one label)
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    request_started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        metrics.REQUEST_SECONDS.labels(
+            route.path if route is not None else "unmatched", request.method, str(status)
+        ).observe(time.perf_counter() - request_started)
+
+
 # Include the routes from Endpoints.py
 app.include_router(vector_router)